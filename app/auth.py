@@ -1,3 +1,4 @@
+import hmac
 from datetime import datetime, timedelta, UTC
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,10 +6,13 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from .config import settings
+from .cache import principal_cache
 from .models import TokenData, UserRole
+from .tracing import traced, tracer
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -26,13 +30,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now(UTC) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    with tracer.span("jwt.encode"):
+        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def verify_token(token: str) -> Optional[TokenData]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        with tracer.span("jwt.decode"):
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             return None
@@ -42,6 +48,7 @@ def verify_token(token: str) -> Optional[TokenData]:
         return None
 
 
+@traced("auth.get_current_user")
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,23 +60,78 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     if token_data is None:
         raise credentials_exception
     
+    user = principal_cache.get(token_data.email)
+    if user is not None:
+        return user
+    
     from .crud import get_user_by_email
     user = await get_user_by_email(token_data.email)
     if user is None:
         raise credentials_exception
+    principal_cache.set(user)
     return user
 
 
+async def revalidate_principal(user: dict) -> dict:
+    """
+    The principal cache is per worker, so a role change or email verification
+    handled by another worker isn't visible here until the entry expires.
+    Privileged checks compare updated_at with the database and reload the
+    user when it moved.
+    """
+    from .crud import get_user_by_email, get_user_stamp
+    stamp = await get_user_stamp(user["id"])
+    if stamp is not None and stamp.get("updated_at") == user.get("updated_at"):
+        return user
+
+    principal_cache.invalidate(email=user["email"], user_id=user["id"])
+    fresh = await get_user_by_email(user["email"]) if stamp is not None else None
+    if fresh is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    principal_cache.set(fresh)
+    return fresh
+
+
+async def get_optional_current_user(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    """Current user when a bearer token is sent, None for anonymous requests"""
+    if not token:
+        return None
+    return await get_current_user(token)
+
+
+@traced("auth.get_current_active_user")
 async def get_current_active_user(current_user = Depends(get_current_user)):
+    if not current_user.get("is_verified", False):
+        # The email may have been verified through another worker
+        current_user = await revalidate_principal(current_user)
     if not current_user.get("is_verified", False):
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
+@traced("auth.get_current_admin_user")
 async def get_current_admin_user(current_user = Depends(get_current_user)):
+    current_user = await revalidate_principal(current_user)
     if current_user.get("role") != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+
+async def get_metrics_access(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    """Scrapers authenticate with METRICS_TOKEN; admins can use their usual bearer token"""
+    if settings.METRICS_TOKEN and token and hmac.compare_digest(token, settings.METRICS_TOKEN):
+        return None
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_admin_user(await get_current_user(token))
@@ -0,0 +1,360 @@
+import asyncio
+import functools
+import gzip
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+from fastapi import HTTPException, Request, Response
+from pymongo.errors import PyMongoError
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: responses are still gzip-compressed without it
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+_MIN_COMPRESS_SIZE = 512
+
+STALE_HEADER = "X-Stale"
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """
+    Bounded in-process LRU cache of authenticated users with a TTL.
+
+    Entries are keyed by email (the JWT subject) with a secondary id -> email
+    index so write paths can invalidate by whichever key they have at hand.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._email_by_id: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, email: str) -> Optional[dict]:
+        entry = self._entries.get(email)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(email)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(email)
+        self.hits += 1
+        # Callers get their own copy so handlers can't mutate the cached entry
+        return dict(user)
+
+    def set(self, user: dict):
+        if not self.enabled:
+            return
+        email = user["email"]
+        self._remove(email)
+        self._entries[email] = (time.monotonic() + self.ttl_seconds, dict(user))
+        if user.get("id"):
+            self._email_by_id[user["id"]] = email
+        while len(self._entries) > self.max_size:
+            oldest_email, (_, oldest_user) = self._entries.popitem(last=False)
+            self._forget_id(oldest_email, oldest_user.get("id"))
+
+    def invalidate(self, email: Optional[str] = None, user_id: Optional[str] = None):
+        if user_id is not None:
+            cached_email = self._email_by_id.pop(user_id, None)
+            if cached_email is not None:
+                self._entries.pop(cached_email, None)
+        if email is not None:
+            self._remove(email)
+
+    def clear(self):
+        self._entries.clear()
+        self._email_by_id.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, email: str):
+        entry = self._entries.pop(email, None)
+        if entry is not None:
+            self._forget_id(email, entry[1].get("id"))
+
+    def _forget_id(self, email: str, user_id: Optional[str]):
+        if user_id is not None and self._email_by_id.get(user_id) == email:
+            del self._email_by_id[user_id]
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, headers: dict, tags: Iterable[str], ttl_seconds: float):
+        self.body = body
+        self.headers = headers
+        self.tags = set(tags)
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl_seconds
+        # Set by a write path: the data is known to have changed
+        self.invalidated = False
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.encoded = {"identity": body}
+        if len(body) >= _MIN_COMPRESS_SIZE:
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(body)
+
+    def is_fresh(self, now: float) -> bool:
+        return not self.invalidated and now < self.expires_at
+
+
+class ResponseCache:
+    """
+    Pre-serialised, pre-compressed JSON bodies for public read endpoints.
+
+    Entries are tagged (e.g. "tournaments", "tournament:<id>") and the CRUD
+    write paths invalidate exactly the tags they affect. The TTL bounds
+    staleness across worker processes, which don't see each other's
+    invalidations.
+
+    Expired and invalidated entries are kept as a last known good copy:
+    within stale_while_revalidate seconds of expiring an entry is served
+    while it refreshes in the background, and within stale_if_error seconds
+    it is served when MongoDB errors or exceeds the latency budget.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        stale_while_revalidate: float = 0,
+        stale_if_error: float = 0,
+        latency_budget: Optional[float] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.latency_budget = latency_budget
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._keys_by_tag: dict = {}
+        self._refreshing: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.refresh_failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the entry for key, fresh or still usable as a stale fallback"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry.expires_at + max(self.stale_while_revalidate, self.stale_if_error):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, body: bytes, tags: Iterable[str], headers: Optional[dict] = None) -> CachedResponse:
+        entry = CachedResponse(body, headers or {}, tags, self.ttl_seconds)
+        if not self.enabled:
+            return entry
+        self._remove(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    def can_serve_while_revalidating(self, entry: CachedResponse, now: float) -> bool:
+        return not entry.invalidated and now < entry.expires_at + self.stale_while_revalidate
+
+    def refresh(self, key: str, tags: Iterable[str], produce: Callable[[], Awaitable[Tuple[bytes, dict]]]) -> asyncio.Task:
+        """Start (or join) the single in-flight refresh of key"""
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, list(tags), produce))
+            task.add_done_callback(functools.partial(self._refresh_done, key))
+            self._refreshing[key] = task
+        return task
+
+    async def _refresh(self, key: str, tags: list, produce) -> CachedResponse:
+        try:
+            body, headers = await produce()
+            return self.set(key, body, tags, headers)
+        except HTTPException:
+            # The resource is gone (e.g. a 404): never serve it stale again
+            self._remove(key)
+            raise
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _refresh_done(self, key: str, task: asyncio.Task):
+        # Retrieving the exception keeps unawaited refreshes from logging "exception never retrieved"
+        if task.cancelled():
+            return
+        exc = task.exception()
+        # HTTP errors (e.g. a 404 for a deleted resource) are answers, not failures
+        if exc is None or isinstance(exc, HTTPException):
+            return
+        self.refresh_failures += 1
+        logger.error("Background cache refresh of %s failed: %s", key, type(exc).__name__, exc_info=exc)
+
+    def invalidate(self, *tags: str):
+        for tag in tags:
+            for key in self._keys_by_tag.get(tag, ()):
+                self._entries[key].invalidated = True
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self._refreshing.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_served": self.stale_served,
+            "refresh_failures": self.refresh_failures,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    stale_while_revalidate=settings.RESPONSE_CACHE_STALE_WHILE_REVALIDATE_SECONDS,
+    stale_if_error=settings.RESPONSE_CACHE_STALE_IF_ERROR_SECONDS,
+    latency_budget=settings.DB_LATENCY_BUDGET_SECONDS,
+)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def build_cached_response(request: Request, entry: CachedResponse, stale_reason: Optional[str] = None) -> Response:
+    """Answer from a cache entry: 304 on a matching If-None-Match, else the best encoding"""
+    headers = {"ETag": entry.etag, "Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+    if stale_reason:
+        headers["Age"] = str(int(time.monotonic() - entry.stored_at))
+        headers[STALE_HEADER] = stale_reason
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    headers.update(entry.headers)
+    accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+    for encoding in ("br", "gzip"):
+        if encoding in entry.encoded and encoding in accepted:
+            headers["Content-Encoding"] = encoding
+            return Response(entry.encoded[encoding], media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+async def cached_json_response(
+    request: Request,
+    key: str,
+    tags: Iterable[str],
+    produce: Callable[[], Awaitable[Tuple[bytes, dict]]]
+) -> Response:
+    """
+    Serve key from the response cache, calling produce() on a miss.
+
+    produce returns the serialised JSON body and any extra headers to keep
+    with it; HTTP errors it raises (e.g. a 404) propagate and are not cached.
+    Database errors and slow refreshes fall back to the last good body, sent
+    with an Age header and X-Stale set to why it is stale.
+    """
+    cache = response_cache
+    now = time.monotonic()
+    entry = cache.get(key)
+    if entry is not None and entry.is_fresh(now):
+        cache.hits += 1
+        return build_cached_response(request, entry)
+
+    cache.misses += 1
+    if entry is not None and cache.can_serve_while_revalidating(entry, now):
+        cache.refresh(key, tags, produce)
+        cache.stale_served += 1
+        return build_cached_response(request, entry, stale_reason="revalidating")
+
+    refresh = cache.refresh(key, tags, produce)
+    try:
+        if entry is not None and cache.latency_budget:
+            # The refresh keeps running and updates the cache if we give up waiting
+            fresh = await asyncio.wait_for(asyncio.shield(refresh), timeout=cache.latency_budget)
+        else:
+            fresh = await refresh
+    except asyncio.TimeoutError:
+        cache.stale_served += 1
+        return build_cached_response(request, entry, stale_reason="timeout")
+    except PyMongoError:
+        # Already logged by the refresh task's done callback
+        if entry is None:
+            raise
+        cache.stale_served += 1
+        return build_cached_response(request, entry, stale_reason="error")
+    return build_cached_response(request, fresh)
@@ -4,11 +4,95 @@ from typing import Optional
 
 class Settings(BaseSettings):
     MONGO_URI: str  
+    MONGO_DB_NAME: str = "fndc"
     RESEND_API_KEY: str
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     GOOGLE_CLIENT_ID: str
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
+
+    # Connections each process keeps open to MongoDB; warm-up opens them before /ready
+    MONGO_MIN_POOL_SIZE: int = 5
+    # Cold starts slower than this are reported by /ready and logged
+    STARTUP_BUDGET_SECONDS: float = 15
+
+    # Bearer token for Prometheus scrapes of /metrics (admins can use their own token)
+    METRICS_TOKEN: Optional[str] = None
+    # Where workers share their samples so /metrics covers all of them (app.server sets one)
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_SNAPSHOT_INTERVAL_SECONDS: float = 5
+
+    # MongoDB commands slower than this go to the slow query log (GET /admin/slow-queries)
+    SLOW_QUERY_THRESHOLD_MS: float = 100
+    SLOW_QUERY_LOG_SIZE: int = 200
+    # Fraction of slow reads/writes that are explained ("executionStats") afterwards
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+
+    # Request tracing, see app/tracing.py ("none", "file" or "otlp")
+    TRACE_EXPORTER: str = "none"
+    # Fraction of requests traced when the caller sends no traceparent
+    TRACE_SAMPLE_RATE: float = 0.05
+    TRACE_FILE_PATH: str = "traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACE_SERVICE_NAME: str = "fndc-api"
+    TRACE_EXPORT_INTERVAL_SECONDS: float = 5
+    TRACE_MAX_QUEUE_SIZE: int = 10000
+
+    # Request profiling, see app/profiling.py ("cprofile" or "sampling")
+    PROFILE_MODE: str = "sampling"
+    # Fraction of requests profiled without an admin X-Profile header (0 disables it)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_SAMPLING_INTERVAL_MS: float = 1
+    PROFILE_MAX_STORED: int = 20
+
+    # List endpoint pagination
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+
+    # Documents fetched per cursor batch when streaming exports
+    EXPORT_BATCH_SIZE: int = 500
+
+    # Principal cache used by get_current_user (0 disables it). Each worker has
+    # its own: a change made through another worker (e.g. a role demotion) is
+    # seen here only after the TTL, except by admin checks and unverified
+    # users, which re-check updated_at against the database
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+
+    # Response cache for public read endpoints (0 disables it)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_TTL_SECONDS: float = 30
+    # How long past expiry a cached body may be served while refreshing / when MongoDB fails
+    RESPONSE_CACHE_STALE_WHILE_REVALIDATE_SECONDS: float = 60
+    RESPONSE_CACHE_STALE_IF_ERROR_SECONDS: float = 86400
+    # Beyond this, public reads fall back to the last good cached body
+    DB_LATENCY_BUDGET_SECONDS: float = 0.5
+
+    # Password hashing pool ("thread" or "process")
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    BCRYPT_ROUNDS: int = 12
+    # When set, BCRYPT_ROUNDS is recalibrated at startup to fit this budget (once,
+    # in the app.server master). Logins only ever rehash to a higher cost
+    BCRYPT_TARGET_MS: Optional[float] = None
+
+    # Email outbox delivery ("resend" or "fake")
+    EMAIL_TRANSPORT: str = "resend"
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_CONCURRENCY: int = 5
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_POLL_INTERVAL_SECONDS: float = 2
+
+    # Production server, see app/server.py (PORT is set by Render)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    # Defaults to the available CPUs, capped by SERVER_MAX_WORKERS
+    SERVER_WORKERS: Optional[int] = None
+    SERVER_MAX_WORKERS: int = 4
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_KEEPALIVE_SECONDS: int = 5
     
     class Config:
         env_file = ".env"
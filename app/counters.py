@@ -0,0 +1,83 @@
+import asyncio
+from pymongo import UpdateOne
+from .models import CubeStatus
+
+COUNTER_FIELDS = ("registration_count", "proposal_count", "enabled_cube_count")
+
+
+async def compute_tournament_counters(database) -> dict:
+    """Recompute every tournament's counters from the source collections"""
+    counters = {}
+
+    registrations = database.tournament_registrations.aggregate([
+        {"$group": {"_id": "$tournament_id", "registration_count": {"$sum": 1}}}
+    ])
+    async for row in registrations:
+        counters.setdefault(row["_id"], {})["registration_count"] = row["registration_count"]
+
+    proposals = database.cube_proposals.aggregate([
+        {"$group": {
+            "_id": "$tournament_id",
+            "proposal_count": {"$sum": 1},
+            "enabled_cube_count": {
+                "$sum": {"$cond": [{"$eq": ["$status", CubeStatus.HABILITADO.value]}, 1, 0]}
+            }
+        }}
+    ])
+    async for row in proposals:
+        entry = counters.setdefault(row["_id"], {})
+        entry["proposal_count"] = row["proposal_count"]
+        entry["enabled_cube_count"] = row["enabled_cube_count"]
+
+    return counters
+
+
+async def reconcile_tournament_counters(database, batch_size: int = 1000) -> int:
+    """
+    Repair drifted tournament counters with bulk updates.
+
+    Stored values are read before recomputing, and each update only applies
+    if they are still the ones observed: a write path's $inc landing meanwhile
+    wins, and that tournament is left for the next run instead of losing the
+    increment. Returns the number of tournaments repaired.
+    """
+    projection = {field: 1 for field in COUNTER_FIELDS}
+    observed = {
+        tournament["_id"]: {field: tournament.get(field) for field in COUNTER_FIELDS}
+        async for tournament in database.tournaments.find({}, projection)
+    }
+    expected = await compute_tournament_counters(database)
+    operations = []
+    repaired = 0
+
+    for tournament_id, stored in observed.items():
+        wanted = expected.get(str(tournament_id), {})
+        values = {field: wanted.get(field, 0) for field in COUNTER_FIELDS}
+        if stored == values:
+            continue
+
+        operations.append(UpdateOne({"_id": tournament_id, **stored}, {"$set": values}))
+        if len(operations) >= batch_size:
+            result = await database.tournaments.bulk_write(operations, ordered=False)
+            repaired += result.modified_count
+            operations = []
+
+    if operations:
+        result = await database.tournaments.bulk_write(operations, ordered=False)
+        repaired += result.modified_count
+    return repaired
+
+
+async def main():
+    from .database import connect_to_mongo, close_mongo_connection, get_db
+
+    await connect_to_mongo()
+    try:
+        repaired = await reconcile_tournament_counters(await get_db())
+        print(f"✅ Tournament counters reconciled ({repaired} repaired)")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
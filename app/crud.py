@@ -1,97 +1,147 @@
+from collections import defaultdict
 from datetime import datetime, UTC
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from .database import get_db
 from .models import UserCreate, UserUpdate, TournamentCreate, CubeProposalCreate
-from .auth import get_password_hash, verify_password
-from .models import UserRole, CubeStatus
+from .cache import principal_cache, response_cache
+from .hashing import password_hasher
+from .pagination import paginate
+from .serialization import construct_one, model_projection, with_id
+from .tracing import traced_operation
+from .models import UserRole, CubeStatus, CubeStatusChange, UserRoleChange, BulkItemStatus
+from .models import Tournament, CubeProposal, TournamentRegistration, User, PublicUser
+
+TOURNAMENT_PROJECTION = model_projection(Tournament)
+TOURNAMENT_FIND_PROJECTION = model_projection(Tournament, computed_id=False)
+CUBE_PROPOSAL_PROJECTION = model_projection(CubeProposal)
+REGISTRATION_PROJECTION = model_projection(TournamentRegistration)
+USER_PROJECTION = model_projection(User)
+# find/find_one_and_update projections: _id is kept and converted by with_id
+USER_FIND_PROJECTION = model_projection(User, computed_id=False)
+CUBE_PROPOSAL_FIND_PROJECTION = model_projection(CubeProposal, computed_id=False)
 
 
 # User CRUD operations
+@traced_operation
 async def create_user(user: UserCreate) -> dict:
     db = await get_db()
     
-    # Check if user already exists
-    existing_user = await db.users.find_one({"email": user.email})
-    if existing_user:
-        raise ValueError("Email already registered")
-    
     now = datetime.now(UTC)
     user_dict = user.dict()
-    user_dict["hashed_password"] = get_password_hash(user.password)
+    user_dict["hashed_password"] = await password_hasher.hash(user.password)
     user_dict["role"] = UserRole.USER
     user_dict["is_verified"] = False
     user_dict["created_at"] = now
     user_dict["updated_at"] = now
     del user_dict["password"]
     
-    result = await db.users.insert_one(user_dict)
-    user_dict["id"] = str(result.inserted_id)
-    return user_dict
+    # The unique index on email rejects duplicates
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise ValueError("Email already registered")
+    return with_id(user_dict)
 
 
+@traced_operation
 async def get_user_by_email(email: str) -> Optional[dict]:
     db = await get_db()
-    user = await db.users.find_one({"email": email})
-    if user:
-        user["id"] = str(user["_id"])
-        del user["_id"]
-    return user
+    return with_id(await db.users.find_one({"email": email}))
 
 
+@traced_operation
 async def get_user_by_id(user_id: str) -> Optional[dict]:
     db = await get_db()
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if user:
-        user["id"] = str(user["_id"])
-        del user["_id"]
-    return user
+    return with_id(await db.users.find_one({"_id": ObjectId(user_id)}))
+
 
+@traced_operation
+async def get_user_stamp(user_id: str) -> Optional[dict]:
+    """Role, verification and updated_at only: enough to tell whether a cached principal is current"""
+    db = await get_db()
+    return await db.users.find_one(
+        {"_id": ObjectId(user_id)},
+        {"_id": 0, "role": 1, "is_verified": 1, "updated_at": 1}
+    )
 
+
+@traced_operation
 async def update_user(user_id: str, user_update: UserUpdate) -> Optional[dict]:
+    """Apply a profile update and return the updated user, or None if it doesn't exist"""
     db = await get_db()
     
     update_data = user_update.dict(exclude_unset=True)
-    if update_data:
-        update_data["updated_at"] = datetime.now(UTC)
-        result = await db.users.update_one(
+    if not update_data:
+        return with_id(await db.users.find_one({"_id": ObjectId(user_id)}, USER_FIND_PROJECTION))
+    
+    update_data["updated_at"] = datetime.now(UTC)
+    try:
+        user = await db.users.find_one_and_update(
             {"_id": ObjectId(user_id)},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection=USER_FIND_PROJECTION,
+            return_document=ReturnDocument.AFTER
         )
-        if result.modified_count:
-            return await get_user_by_id(user_id)
-    return None
+    except DuplicateKeyError:
+        raise ValueError("Email already registered")
+    principal_cache.invalidate(user_id=user_id)
+    return with_id(user)
 
 
-async def verify_user_email(email: str) -> bool:
+@traced_operation
+async def verify_user_email(email: str) -> Optional[dict]:
+    """Mark the user as verified and return it, or None if no user has this email"""
     db = await get_db()
-    result = await db.users.update_one(
+    user = await db.users.find_one_and_update(
         {"email": email},
-        {"$set": {"is_verified": True, "updated_at": datetime.now(UTC)}}
+        {"$set": {"is_verified": True, "updated_at": datetime.now(UTC)}},
+        projection=USER_FIND_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
-    return result.modified_count > 0
+    principal_cache.invalidate(email=email)
+    return with_id(user)
 
 
+@traced_operation
 async def update_user_password(email: str, new_password: str) -> bool:
     db = await get_db()
-    hashed_password = get_password_hash(new_password)
+    hashed_password = await password_hasher.hash(new_password)
     result = await db.users.update_one(
         {"email": email},
         {"$set": {"hashed_password": hashed_password, "updated_at": datetime.now(UTC)}}
     )
+    principal_cache.invalidate(email=email)
     return result.modified_count > 0
 
 
+@traced_operation
 async def authenticate_user(email: str, password: str) -> Optional[dict]:
     user = await get_user_by_email(email)
-    if not user:
+    if not user or not user.get("hashed_password"):
         return None
-    if not verify_password(password, user["hashed_password"]):
+    
+    valid, new_hash = await password_hasher.verify_and_update(password, user["hashed_password"])
+    if not valid:
         return None
+    
+    # Opportunistic rehash when the configured bcrypt cost has changed
+    if new_hash:
+        db = await get_db()
+        await db.users.update_one(
+            {"_id": ObjectId(user["id"]), "hashed_password": user["hashed_password"]},
+            {"$set": {"hashed_password": new_hash}}
+        )
+        user["hashed_password"] = new_hash
+        principal_cache.invalidate(email=email)
     return user
 
 
 # Tournament CRUD operations
+@traced_operation
 async def create_tournament(tournament: TournamentCreate, admin_id: str) -> dict:
     db = await get_db()
     now = datetime.now(UTC)
@@ -99,31 +149,92 @@ async def create_tournament(tournament: TournamentCreate, admin_id: str) -> dict
     tournament_dict["created_by"] = admin_id
     tournament_dict["created_at"] = now
     tournament_dict["updated_at"] = now
+    tournament_dict["registration_count"] = 0
+    tournament_dict["proposal_count"] = 0
+    tournament_dict["enabled_cube_count"] = 0
     
-    result = await db.tournaments.insert_one(tournament_dict)
-    tournament_dict["id"] = str(result.inserted_id)
-    return tournament_dict
+    await db.tournaments.insert_one(tournament_dict)
+    response_cache.invalidate("tournaments")
+    return with_id(tournament_dict)
+
+
+@traced_operation
+async def get_tournaments(
+    limit: int, cursor: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    db = await get_db()
+    projection = model_projection(Tournament, fields=fields) if fields else TOURNAMENT_PROJECTION
+    return await paginate(db.tournaments, {}, projection, limit, cursor)
+
+
+@traced_operation
+async def get_tournament_by_id(tournament_id: str, fields: Optional[Tuple[str, ...]] = None) -> Optional[dict]:
+    db = await get_db()
+    projection = model_projection(Tournament, computed_id=False, fields=fields) if fields else TOURNAMENT_FIND_PROJECTION
+    return with_id(await db.tournaments.find_one({"_id": ObjectId(tournament_id)}, projection))
 
 
-async def get_tournaments() -> List[dict]:
+@traced_operation
+async def get_tournament_overview(tournament_id: str, user_id: Optional[str] = None) -> Optional[dict]:
+    """
+    Tournament, registration count, enabled cubes and the caller's
+    registration status in a single aggregation round-trip.
+    """
     db = await get_db()
-    tournaments = await db.tournaments.find().to_list(length=None)
-    for tournament in tournaments:
-        tournament["id"] = str(tournament["_id"])
-        del tournament["_id"]
-    return tournaments
+    try:
+        object_id = ObjectId(tournament_id)
+    except InvalidId:
+        return None
+    
+    registration_facets = {"count": [{"$count": "value"}]}
+    if user_id is not None:
+        registration_facets["mine"] = [{"$match": {"user_id": user_id}}, {"$limit": 1}, {"$project": {"_id": 1}}]
+    
+    pipeline = [
+        {"$match": {"_id": object_id}},
+        {"$lookup": {
+            "from": "tournament_registrations",
+            "pipeline": [
+                {"$match": {"tournament_id": tournament_id}},
+                {"$facet": registration_facets}
+            ],
+            "as": "registrations"
+        }},
+        {"$lookup": {
+            "from": "cube_proposals",
+            "pipeline": [
+                {"$match": {"tournament_id": tournament_id, "status": CubeStatus.HABILITADO.value}},
+                {"$project": CUBE_PROPOSAL_PROJECTION}
+            ],
+            "as": "enabled_cubes"
+        }},
+        {"$project": {**TOURNAMENT_PROJECTION, "registrations": 1, "enabled_cubes": 1}}
+    ]
+    
+    results = await db.tournaments.aggregate(pipeline).to_list(length=1)
+    if not results:
+        return None
+    
+    tournament = results[0]
+    registrations = tournament.pop("registrations")[0]
+    enabled_cubes = tournament.pop("enabled_cubes")
+    count = registrations["count"]
+    return {
+        "tournament": tournament,
+        "registration_count": count[0]["value"] if count else 0,
+        "enabled_cubes": enabled_cubes,
+        "is_registered": bool(registrations["mine"]) if user_id is not None else None
+    }
 
 
-async def get_tournament_by_id(tournament_id: str) -> Optional[dict]:
+async def _inc_tournament_counters(tournament_id: str, **deltas: int):
     db = await get_db()
-    tournament = await db.tournaments.find_one({"_id": ObjectId(tournament_id)})
-    if tournament:
-        tournament["id"] = str(tournament["_id"])
-        del tournament["_id"]
-    return tournament
+    await db.tournaments.update_one({"_id": ObjectId(tournament_id)}, {"$inc": deltas})
+    response_cache.invalidate("tournaments", f"tournament:{tournament_id}")
 
 
 # Cube Proposal CRUD operations
+@traced_operation
 async def create_cube_proposal(proposal: CubeProposalCreate, user_id: str) -> dict:
     db = await get_db()
     now = datetime.now(UTC)
@@ -133,53 +244,63 @@ async def create_cube_proposal(proposal: CubeProposalCreate, user_id: str) -> di
     proposal_dict["created_at"] = now
     proposal_dict["updated_at"] = now
     
-    result = await db.cube_proposals.insert_one(proposal_dict)
-    proposal_dict["id"] = str(result.inserted_id)
-    return proposal_dict
+    await db.cube_proposals.insert_one(proposal_dict)
+    await _inc_tournament_counters(proposal.tournament_id, proposal_count=1)
+    return with_id(proposal_dict)
 
 
-async def get_cube_proposals_by_tournament(tournament_id: str) -> List[dict]:
+@traced_operation
+async def get_cube_proposals_by_tournament(
+    tournament_id: str, limit: int, cursor: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None
+) -> Tuple[List[dict], Optional[str]]:
     db = await get_db()
-    proposals = await db.cube_proposals.find({"tournament_id": tournament_id}).to_list(length=None)
-    for proposal in proposals:
-        proposal["id"] = str(proposal["_id"])
-        del proposal["_id"]
-    return proposals
+    projection = model_projection(CubeProposal, fields=fields) if fields else CUBE_PROPOSAL_PROJECTION
+    return await paginate(db.cube_proposals, {"tournament_id": tournament_id}, projection, limit, cursor)
 
 
-async def get_enabled_cubes_by_tournament(tournament_id: str) -> List[dict]:
+@traced_operation
+async def get_enabled_cubes_by_tournament(tournament_id: str, fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
     db = await get_db()
-    proposals = await db.cube_proposals.find({
-        "tournament_id": tournament_id,
-        "status": CubeStatus.HABILITADO
-    }).to_list(length=None)
-    for proposal in proposals:
-        proposal["id"] = str(proposal["_id"])
-        del proposal["_id"]
-    return proposals
+    projection = model_projection(CubeProposal, fields=fields) if fields else CUBE_PROPOSAL_PROJECTION
+    return await db.cube_proposals.aggregate([
+        {"$match": {"tournament_id": tournament_id, "status": CubeStatus.HABILITADO.value}},
+        {"$project": projection}
+    ]).to_list(length=None)
 
 
-async def update_cube_status(proposal_id: str, status: CubeStatus) -> bool:
+@traced_operation
+async def update_cube_status(proposal_id: str, status: CubeStatus) -> Optional[dict]:
+    """Set a proposal's status and return the updated proposal, or None if it doesn't exist"""
     db = await get_db()
-    result = await db.cube_proposals.update_one(
-        {"_id": ObjectId(proposal_id)},
-        {"$set": {"status": status, "updated_at": datetime.now(UTC)}}
+    try:
+        object_id = ObjectId(proposal_id)
+    except InvalidId:
+        return None
+    
+    # Only match real transitions so the enabled counter moves exactly once
+    proposal = await db.cube_proposals.find_one_and_update(
+        {"_id": object_id, "status": {"$ne": status}},
+        {"$set": {"status": status, "updated_at": datetime.now(UTC)}},
+        projection=CUBE_PROPOSAL_FIND_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
-    return result.modified_count > 0
+    if proposal is None:
+        # Already in that status (idempotent) or missing
+        return with_id(await db.cube_proposals.find_one({"_id": object_id}, CUBE_PROPOSAL_FIND_PROJECTION))
+    
+    await _inc_tournament_counters(
+        proposal["tournament_id"],
+        enabled_cube_count=1 if status == CubeStatus.HABILITADO else -1
+    )
+    response_cache.invalidate(f"cubes:{proposal['tournament_id']}")
+    return with_id(proposal)
 
 
 # Tournament Registration CRUD operations
+@traced_operation
 async def register_user_to_tournament(tournament_id: str, user_id: str) -> dict:
     db = await get_db()
     
-    # Check if user is already registered
-    existing_registration = await db.tournament_registrations.find_one({
-        "tournament_id": tournament_id,
-        "user_id": user_id
-    })
-    if existing_registration:
-        raise ValueError("User already registered for this tournament")
-    
     now = datetime.now(UTC)
     registration = {
         "tournament_id": tournament_id,
@@ -187,20 +308,34 @@ async def register_user_to_tournament(tournament_id: str, user_id: str) -> dict:
         "registered_at": now
     }
     
-    result = await db.tournament_registrations.insert_one(registration)
-    registration["id"] = str(result.inserted_id)
-    return registration
+    # The unique (tournament_id, user_id) index rejects double registrations
+    try:
+        await db.tournament_registrations.insert_one(registration)
+    except DuplicateKeyError:
+        raise ValueError("User already registered for this tournament")
+    await _inc_tournament_counters(tournament_id, registration_count=1)
+    return with_id(registration)
 
 
-async def get_tournament_registrations(tournament_id: str) -> List[dict]:
+@traced_operation
+async def get_tournament_registrations(
+    tournament_id: str, limit: int, cursor: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None
+) -> Tuple[List[dict], Optional[str]]:
     db = await get_db()
-    registrations = await db.tournament_registrations.find({"tournament_id": tournament_id}).to_list(length=None)
-    for registration in registrations:
-        registration["id"] = str(registration["_id"])
-        del registration["_id"]
-    return registrations
+    projection = model_projection(TournamentRegistration, fields=fields) if fields else REGISTRATION_PROJECTION
+    return await paginate(db.tournament_registrations, {"tournament_id": tournament_id}, projection, limit, cursor)
 
 
+@traced_operation
+async def iter_tournament_registrations(tournament_id: str, batch_size: int) -> AsyncIterator[List[dict]]:
+    """Yield a tournament's registrations in batches, straight from the cursor"""
+    db = await get_db()
+    cursor = db.tournament_registrations.find({"tournament_id": tournament_id}).sort("_id", 1).batch_size(batch_size)
+    async for batch in _iter_batches(cursor, batch_size):
+        yield batch
+
+
+@traced_operation
 async def check_user_registration(tournament_id: str, user_id: str) -> bool:
     db = await get_db()
     registration = await db.tournament_registrations.find_one({
@@ -211,77 +346,375 @@ async def check_user_registration(tournament_id: str, user_id: str) -> bool:
 
 
 # Google Auth CRUD operations
+@traced_operation
 async def get_user_by_google_id(google_id: str) -> Optional[dict]:
     db = await get_db()
-    user = await db.users.find_one({"google_id": google_id})
-    if user:
-        user["id"] = str(user["_id"])
-        del user["_id"]
-    return user
+    return with_id(await db.users.find_one({"google_id": google_id}))
+
 
+@traced_operation
+async def upsert_google_user(user_info: dict) -> dict:
+    """
+    Find, link or create the user for a Google sign-in in one round-trip.
 
-async def create_google_user(user_info: dict) -> dict:
+    Matches the account already linked to this Google ID, or else an unlinked
+    account with the same email, which gets linked; otherwise a new verified
+    user is inserted. Two concurrent first logins both try to insert and the
+    unique email/google_id indexes reject one of them, which is retried once
+    and then matches the winner's document.
+    """
     db = await get_db()
-    
-    # Check if user already exists by email
-    existing_user = await db.users.find_one({"email": user_info["email"]})
-    if existing_user:
-        # Update existing user with Google ID if not already set
-        if not existing_user.get("google_id"):
-            await db.users.update_one(
-                {"email": user_info["email"]},
-                {"$set": {
-                    "google_id": user_info["google_id"],
-                    "is_verified": True,  # Google users are pre-verified
-                    "updated_at": datetime.now(UTC)
-                }}
-            )
-            existing_user["google_id"] = user_info["google_id"]
-            existing_user["is_verified"] = True
-        
-        existing_user["id"] = str(existing_user["_id"])
-        del existing_user["_id"]
-        return existing_user
-    
-    # Create new Google user
+    google_id = user_info["google_id"]
+    email = user_info["email"]
     now = datetime.now(UTC)
-    user_dict = {
-        "email": user_info["email"],
+    
+    on_insert = {
+        "email": email,
         "name": user_info["name"],
-        "google_id": user_info["google_id"],
         "role": UserRole.USER,
-        "is_verified": True,  # Google users are pre-verified
-        "created_at": now,
-        "updated_at": now
+        "created_at": now
     }
-    
     # Add picture if available
     if user_info.get("picture"):
-        user_dict["picture"] = user_info["picture"]
+        on_insert["picture"] = user_info["picture"]
+    
+    for attempt in range(2):
+        try:
+            user = await db.users.find_one_and_update(
+                {"$or": [
+                    {"google_id": google_id},
+                    # Never re-link an account that belongs to another Google ID
+                    {"email": email, "google_id": None}
+                ]},
+                {
+                    "$set": {
+                        "google_id": google_id,
+                        "is_verified": True,  # Google users are pre-verified
+                        "updated_at": now
+                    },
+                    "$setOnInsert": on_insert
+                },
+                # Prefer the linked account if the email now matches another one
+                sort=[("google_id", DESCENDING)],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            if attempt:
+                # Still no match: the email is linked to a different Google account
+                raise ValueError("Email is already linked to another Google account")
     
-    result = await db.users.insert_one(user_dict)
-    user_dict["id"] = str(result.inserted_id)
-    return user_dict
+    principal_cache.invalidate(email=email)
+    return with_id(user)
 
 
-async def update_user_role(user_id: str, new_role: UserRole) -> bool:
-    """Update user role (admin only)"""
+@traced_operation
+async def update_user_role(user_id: str, new_role: UserRole) -> Optional[dict]:
+    """Update user role and return the updated user, or None if it doesn't exist (admin only)"""
     db = await get_db()
-    result = await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"role": new_role, "updated_at": datetime.now(UTC)}}
+    try:
+        object_id = ObjectId(user_id)
+    except InvalidId:
+        return None
+    
+    user = await db.users.find_one_and_update(
+        {"_id": object_id},
+        {"$set": {"role": new_role, "updated_at": datetime.now(UTC)}},
+        projection=USER_FIND_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
-    return result.modified_count > 0
+    principal_cache.invalidate(user_id=user_id)
+    return with_id(user)
 
 
-async def get_all_users() -> List[dict]:
-    """Get all users (admin only)"""
+PUBLIC_USER_PROJECTION = {"name": 1, "picture": 1, "preferred_cube": 1}
+
+
+@traced_operation
+async def expand_users(documents: List[dict]) -> List[dict]:
+    """Embed each document's user public profile under "user" using one $in query"""
+    user_ids = set()
+    for document in documents:
+        try:
+            user_ids.add(ObjectId(document["user_id"]))
+        except (InvalidId, TypeError):
+            continue
+    
+    users_by_id = {}
+    if user_ids:
+        db = await get_db()
+        users = await db.users.find({"_id": {"$in": list(user_ids)}}, PUBLIC_USER_PROJECTION).to_list(length=len(user_ids))
+        for user in users:
+            # Defaults filled in so unset profile fields still serialise as null
+            with_id(user)
+            users_by_id[user["id"]] = construct_one(PublicUser, user)
+    
+    for document in documents:
+        document["user"] = users_by_id.get(document["user_id"])
+    return documents
+
+
+@traced_operation
+async def get_all_users(
+    limit: int, cursor: Optional[str] = None, fields: Optional[Tuple[str, ...]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Get one page of users (admin only)"""
+    db = await get_db()
+    # The projection only emits User fields, so password hashes never leave the database
+    projection = model_projection(User, fields=fields) if fields else USER_PROJECTION
+    return await paginate(db.users, {}, projection, limit, cursor)
+
+
+@traced_operation
+async def iter_users(batch_size: int) -> AsyncIterator[List[dict]]:
+    """Yield all users in batches without their password hashes (admin export)"""
+    db = await get_db()
+    cursor = db.users.find({}, model_projection(User, computed_id=False)).sort("_id", 1).batch_size(batch_size)
+    async for batch in _iter_batches(cursor, batch_size):
+        yield batch
+
+
+async def _iter_batches(cursor, batch_size: int) -> AsyncIterator[List[dict]]:
+    while True:
+        batch = await cursor.to_list(length=batch_size)
+        if not batch:
+            break
+        for document in batch:
+            with_id(document)
+        yield batch
+
+
+# Bulk admin operations
+_FAILED_STATUSES = {
+    BulkItemStatus.NOT_FOUND, BulkItemStatus.INVALID, BulkItemStatus.DUPLICATE,
+    BulkItemStatus.ERROR, BulkItemStatus.SKIPPED
+}
+
+
+def _bulk_item(index: int, status: BulkItemStatus, item_id: Optional[str] = None, detail: Optional[str] = None) -> dict:
+    return {"index": index, "id": item_id, "status": status, "detail": detail}
+
+
+def _bulk_summary(results: List[dict]) -> dict:
+    failed = sum(1 for result in results if result["status"] in _FAILED_STATUSES)
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
+
+
+def _apply_ordered_cutoff(results: List[dict], operations: List[tuple]) -> List[tuple]:
+    """In ordered mode, skip everything after the first item that failed validation"""
+    failures = [result["index"] for result in results if result["status"] in _FAILED_STATUSES]
+    if not failures:
+        return operations
+    cutoff = min(failures)
+    for result in results[cutoff + 1:]:
+        result.update(status=BulkItemStatus.SKIPPED, detail="Not executed after an earlier failure")
+    return [operation for operation in operations if operation[0] < cutoff]
+
+
+async def _run_bulk(collection, operations: List[tuple], results: List[dict], ordered: bool) -> Tuple[List[int], int]:
+    """
+    Execute (item_index, operation) pairs with one bulk_write and record
+    per-item errors. Returns the indexes of the items that ran without error
+    and the number of documents the server reports inserted or modified.
+    """
+    if ordered:
+        operations = _apply_ordered_cutoff(results, operations)
+    if not operations:
+        return [], 0
+    
+    write_errors = {}
+    try:
+        result = await collection.bulk_write([operation for _, operation in operations], ordered=ordered)
+        changed = result.inserted_count + result.modified_count
+    except BulkWriteError as e:
+        write_errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+        changed = e.details.get("nInserted", 0) + e.details.get("nModified", 0)
+    stop_at = min(write_errors) if ordered and write_errors else None
+    
+    applied = []
+    for position, (index, _) in enumerate(operations):
+        error = write_errors.get(position)
+        if error is not None:
+            status = BulkItemStatus.DUPLICATE if error.get("code") == 11000 else BulkItemStatus.ERROR
+            results[index].update(status=status, detail=error.get("errmsg"))
+        elif stop_at is not None and position > stop_at:
+            results[index].update(status=BulkItemStatus.SKIPPED, detail="Not executed after an earlier failure")
+        else:
+            applied.append(index)
+    return applied, changed
+
+
+def _group_operations(operations: List[tuple], keys: Dict[int, tuple], ordered: bool) -> List[Tuple[tuple, List[tuple]]]:
+    """
+    Split (item_index, operation) pairs by key, one bulk_write each. Ordered
+    mode only groups consecutive items so execution order is kept.
+    """
+    groups = []
+    by_key = {}
+    for index, operation in operations:
+        key = keys[index]
+        if ordered:
+            if not groups or groups[-1][0] != key:
+                groups.append((key, []))
+            groups[-1][1].append((index, operation))
+        else:
+            if key not in by_key:
+                by_key[key] = []
+                groups.append((key, by_key[key]))
+            by_key[key].append((index, operation))
+    return groups
+
+
+async def _bulk_inc_tournament_counters(field: str, deltas: Dict[str, int]):
+    operations = [
+        UpdateOne({"_id": ObjectId(tournament_id)}, {"$inc": {field: delta}})
+        for tournament_id, delta in deltas.items() if delta
+    ]
+    if operations:
+        db = await get_db()
+        await db.tournaments.bulk_write(operations, ordered=False)
+        response_cache.invalidate("tournaments", *(f"tournament:{tournament_id}" for tournament_id in deltas))
+
+
+@traced_operation
+async def bulk_update_cube_status(items: List[CubeStatusChange], ordered: bool = False) -> dict:
+    """Change the status of many cube proposals with one pre-read and one bulk_write"""
     db = await get_db()
-    users = await db.users.find().to_list(length=None)
-    for user in users:
-        user["id"] = str(user["_id"])
-        del user["_id"]
-        # Remove sensitive information
-        if "hashed_password" in user:
-            del user["hashed_password"]
-    return users 
\ No newline at end of file
+    results = [_bulk_item(index, BulkItemStatus.UPDATED, item.proposal_id) for index, item in enumerate(items)]
+    
+    object_ids = {}
+    for index, item in enumerate(items):
+        try:
+            object_ids[index] = ObjectId(item.proposal_id)
+        except InvalidId:
+            results[index].update(status=BulkItemStatus.INVALID, detail="Invalid proposal id")
+    
+    proposals = {
+        proposal["_id"]: proposal
+        async for proposal in db.cube_proposals.find(
+            {"_id": {"$in": list(set(object_ids.values()))}},
+            {"status": 1, "tournament_id": 1}
+        )
+    }
+    
+    now = datetime.now(UTC)
+    operations = []
+    counter_changes = {}
+    for index, item in enumerate(items):
+        if index not in object_ids:
+            continue
+        proposal = proposals.get(object_ids[index])
+        if proposal is None:
+            results[index].update(status=BulkItemStatus.NOT_FOUND, detail="Cube proposal not found")
+            continue
+        if proposal["status"] == item.status:
+            results[index]["status"] = BulkItemStatus.UNCHANGED
+            continue
+        
+        # Later items for the same proposal see this change
+        proposal["status"] = item.status
+        operations.append((index, UpdateOne(
+            {"_id": object_ids[index], "status": {"$ne": item.status}},
+            {"$set": {"status": item.status, "updated_at": now}}
+        )))
+        counter_changes[index] = (proposal["tournament_id"], 1 if item.status == CubeStatus.HABILITADO else -1)
+    
+    # One bulk_write per tournament and direction, so its modified_count is
+    # exactly how far the counter moves: the $ne filter matches nothing when a
+    # concurrent change already set the status
+    deltas = defaultdict(int)
+    groups = _group_operations(operations, counter_changes, ordered)
+    for position, ((tournament_id, delta), group) in enumerate(groups):
+        applied, modified = await _run_bulk(db.cube_proposals, group, results, ordered)
+        deltas[tournament_id] += delta * modified
+        if applied and not modified:
+            for index in applied:
+                results[index]["status"] = BulkItemStatus.UNCHANGED
+        if ordered and len(applied) < len(group):
+            for _, later_group in groups[position + 1:]:
+                for index, _ in later_group:
+                    results[index].update(status=BulkItemStatus.SKIPPED, detail="Not executed after an earlier failure")
+            break
+    await _bulk_inc_tournament_counters("enabled_cube_count", deltas)
+    response_cache.invalidate(*(f"cubes:{tournament_id}" for tournament_id in deltas))
+    return _bulk_summary(results)
+
+
+@traced_operation
+async def bulk_update_user_roles(items: List[UserRoleChange], acting_user_id: str, ordered: bool = False) -> dict:
+    """Change the role of many users with one pre-read and one bulk_write"""
+    db = await get_db()
+    results = [_bulk_item(index, BulkItemStatus.UPDATED, item.user_id) for index, item in enumerate(items)]
+    
+    object_ids = {}
+    for index, item in enumerate(items):
+        if item.user_id == acting_user_id:
+            results[index].update(status=BulkItemStatus.INVALID, detail="Cannot change your own role")
+            continue
+        try:
+            object_ids[index] = ObjectId(item.user_id)
+        except InvalidId:
+            results[index].update(status=BulkItemStatus.INVALID, detail="Invalid user id")
+    
+    users = {
+        user["_id"]: user
+        async for user in db.users.find({"_id": {"$in": list(set(object_ids.values()))}}, {"role": 1})
+    }
+    
+    now = datetime.now(UTC)
+    operations = []
+    for index, item in enumerate(items):
+        if index not in object_ids:
+            continue
+        user = users.get(object_ids[index])
+        if user is None:
+            results[index].update(status=BulkItemStatus.NOT_FOUND, detail="User not found")
+            continue
+        if user.get("role") == item.role:
+            results[index]["status"] = BulkItemStatus.UNCHANGED
+            continue
+        
+        user["role"] = item.role
+        operations.append((index, UpdateOne(
+            {"_id": object_ids[index]},
+            {"$set": {"role": item.role, "updated_at": now}}
+        )))
+    
+    applied, _ = await _run_bulk(db.users, operations, results, ordered)
+    for index in applied:
+        principal_cache.invalidate(user_id=items[index].user_id)
+    return _bulk_summary(results)
+
+
+@traced_operation
+async def import_tournament_registrations(tournament_id: str, emails: List[str], ordered: bool = False) -> dict:
+    """Register many users, identified by email, to a tournament with one bulk_write"""
+    db = await get_db()
+    user_ids = {
+        user["email"]: str(user["_id"])
+        async for user in db.users.find({"email": {"$in": list(set(emails))}}, {"email": 1})
+    }
+    
+    now = datetime.now(UTC)
+    results = []
+    operations = []
+    for index, email in enumerate(emails):
+        user_id = user_ids.get(email)
+        if user_id is None:
+            results.append(_bulk_item(index, BulkItemStatus.NOT_FOUND, detail=f"No user registered with {email}"))
+            continue
+        results.append(_bulk_item(index, BulkItemStatus.CREATED, user_id))
+        operations.append((index, InsertOne({
+            "tournament_id": tournament_id,
+            "user_id": user_id,
+            "registered_at": now
+        })))
+    
+    _, inserted = await _run_bulk(db.tournament_registrations, operations, results, ordered)
+    for result in results:
+        if result["status"] == BulkItemStatus.DUPLICATE:
+            result["detail"] = "User already registered for this tournament"
+    # What the server reports inserted, not what we sent
+    await _bulk_inc_tournament_counters("registration_count", {tournament_id: inserted})
+    return _bulk_summary(results)
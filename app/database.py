@@ -1,5 +1,8 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.metrics import mongo_event_listeners
+from app.slow_queries import SlowQueryListener
+from app.tracing import TracingCommandListener
 
 
 class Database:
@@ -15,12 +18,18 @@ async def get_database() -> AsyncIOMotorClient:
 
 async def get_db() -> AsyncIOMotorClient:
     """Get the database instance"""
-    return db.client.fndc
+    return db.client[settings.MONGO_DB_NAME]
 
 
 async def connect_to_mongo():
     # Simple configuration that works with MongoDB Atlas
-    db.client = AsyncIOMotorClient(settings.MONGO_URI)
+    db.client = AsyncIOMotorClient(
+        settings.MONGO_URI,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        # Command timings and pool stats for /metrics, slow commands for /admin/slow-queries,
+        # command spans for sampled traces
+        event_listeners=mongo_event_listeners() + [SlowQueryListener(lambda: db.client), TracingCommandListener()]
+    )
     print("✅ Connected to MongoDB.")
     return db.client
 
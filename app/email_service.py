@@ -1,13 +1,13 @@
-import resend
 from .config import settings
+from .outbox import enqueue_email, outbox_worker
+from .tracing import tracer
 from datetime import datetime, timedelta, UTC
 import jwt
 
 
 class EmailService:
-    def __init__(self):
-        resend.api_key = settings.RESEND_API_KEY
-    
+    """Builds transactional emails and queues them in the outbox for delivery"""
+
     def create_verification_token(self, email: str) -> str:
         """Create a verification token for email verification"""
         payload = {
@@ -15,7 +15,8 @@ class EmailService:
             "type": "verification",
             "exp": datetime.now(UTC) + timedelta(hours=24)
         }
-        return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        with tracer.span("jwt.encode"):
+            return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     def create_password_reset_token(self, email: str) -> str:
         """Create a password reset token"""
@@ -24,12 +25,14 @@ class EmailService:
             "type": "password_reset",
             "exp": datetime.now(UTC) + timedelta(hours=1)
         }
-        return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        with tracer.span("jwt.encode"):
+            return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     def verify_token(self, token: str, token_type: str):
         """Verify a token and return the email"""
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            with tracer.span("jwt.decode"):
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
             if payload.get("type") != token_type:
                 return None
             return payload.get("email")
@@ -59,15 +62,16 @@ class EmailService:
         """
         
         try:
-            resend.Emails.send({
-                "from": "noreply@fndc.com",
-                "to": [email],
-                "subject": "Verifica tu cuenta - FNDC Tournament System",
-                "html": html_content
-            })
+            await enqueue_email(
+                to=[email],
+                subject="Verifica tu cuenta - FNDC Tournament System",
+                html=html_content,
+                kind="verification"
+            )
+            outbox_worker.notify()
             return True
         except Exception as e:
-            print(f"Error sending verification email: {e}")
+            print(f"Error queueing verification email: {e}")
             return False
     
     async def send_password_reset_email(self, email: str, name: str):
@@ -91,15 +95,16 @@ class EmailService:
         """
         
         try:
-            resend.Emails.send({
-                "from": "noreply@fndc.com",
-                "to": [email],
-                "subject": "Recuperación de Contraseña - FNDC Tournament System",
-                "html": html_content
-            })
+            await enqueue_email(
+                to=[email],
+                subject="Recuperación de Contraseña - FNDC Tournament System",
+                html=html_content,
+                kind="password_reset"
+            )
+            outbox_worker.notify()
             return True
         except Exception as e:
-            print(f"Error sending password reset email: {e}")
+            print(f"Error queueing password reset email: {e}")
             return False
 
 
@@ -0,0 +1,67 @@
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, List
+from fastapi.responses import StreamingResponse
+from .models import ExportFormat
+from .serialization import dumps
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(dumps(row) + b"\n" for row in batch)
+
+
+async def csv_chunks(batches: AsyncIterator[List[dict]], columns: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        for row in batch:
+            writer.writerow([_csv_value(row.get(column)) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for empty exports
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(
+    batches: AsyncIterator[List[dict]],
+    export_format: ExportFormat,
+    columns: List[str],
+    filename: str
+) -> StreamingResponse:
+    """
+    Stream batches of rows as NDJSON or CSV.
+
+    One chunk is produced per database batch and the generator is only
+    advanced after the previous chunk was sent, so a slow client pauses the
+    Mongo cursor instead of making the server buffer the export.
+    """
+    if export_format == ExportFormat.CSV:
+        chunks = csv_chunks(batches, columns)
+    else:
+        chunks = ndjson_chunks(batches)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'}
+    )
@@ -1,26 +1,145 @@
-import os
-from google.auth.transport import requests
-from google.oauth2 import id_token
+import asyncio
+import re
+from abc import ABC, abstractmethod
+import time
+from typing import Dict, Optional, Tuple
+import requests
+from google.auth import jwt as google_jwt
 from google.auth.exceptions import GoogleAuthError
 from app.config import settings
 
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _parse_max_age(cache_control: Optional[str]) -> Optional[float]:
+    if not cache_control:
+        return None
+    match = _MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else None
+
+
+class CertSource(ABC):
+    """Where Google's signing certificates come from"""
+
+    @abstractmethod
+    async def fetch(self) -> Tuple[Dict[str, str], Optional[float]]:
+        """Return a {kid: PEM certificate} mapping and its max-age in seconds, if known"""
+
+
+class HTTPCertSource(CertSource):
+    """Fetches the PEM certificates over HTTP without blocking the event loop"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self) -> Tuple[Dict[str, str], Optional[float]]:
+        response = await asyncio.to_thread(requests.get, self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json(), _parse_max_age(response.headers.get("Cache-Control"))
+
+
+class StaticCertSource(CertSource):
+    """Fixed certificates, for tests and offline benchmarks"""
+
+    def __init__(self, certs: Dict[str, str], max_age: Optional[float] = None):
+        self.certs = certs
+        self.max_age = max_age
+
+    async def fetch(self) -> Tuple[Dict[str, str], Optional[float]]:
+        return dict(self.certs), self.max_age
+
+
+class GoogleCertCache:
+    """
+    In-process cache of Google's signing certificates.
+
+    Certificates are kept for the Cache-Control max-age returned by the source
+    and refreshed in the background once they are within refresh_margin of
+    expiring, so token verification normally never waits on the network.
+    Forced refreshes (unknown key ids) happen at most once per
+    min_force_interval, so forged tokens can't make every request fetch.
+    """
+
+    def __init__(
+        self,
+        source: CertSource,
+        default_max_age: float = 3600,
+        refresh_margin: float = 300,
+        min_force_interval: float = 60
+    ):
+        self.source = source
+        self.default_max_age = default_max_age
+        self.refresh_margin = refresh_margin
+        self.min_force_interval = min_force_interval
+        self._certs: Optional[Dict[str, str]] = None
+        self._expires_at = 0.0
+        self._fetched_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get_certs(self) -> Dict[str, str]:
+        now = time.monotonic()
+        if self._certs is None or now >= self._expires_at:
+            return await self.refresh()
+
+        if now >= self._expires_at - self.refresh_margin and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+        return self._certs
+
+    async def refresh(self, force: bool = False) -> Dict[str, str]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            now = time.monotonic()
+            if self._certs is not None and now < self._expires_at:
+                if not force:
+                    return self._certs
+                # Fetched moments ago (maybe by the caller we waited for): nothing newer to get
+                if self._fetched_at is not None and now - self._fetched_at < self.min_force_interval:
+                    return self._certs
+
+            certs, max_age = await self.source.fetch()
+            self._certs = certs
+            self._fetched_at = time.monotonic()
+            self._expires_at = self._fetched_at + (max_age if max_age is not None else self.default_max_age)
+            return certs
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh(force=True)
+        except Exception as e:
+            print(f"Error refreshing Google certificates: {e}")
+        finally:
+            self._refresh_task = None
+
 
 class GoogleAuthService:
-    def __init__(self):
+    def __init__(self, cert_source: Optional[CertSource] = None):
         self.client_id = settings.GOOGLE_CLIENT_ID
-    
+        self.cert_cache = GoogleCertCache(cert_source or HTTPCertSource(settings.GOOGLE_CERTS_URL))
+
     async def verify_google_token(self, token: str) -> dict:
         """
         Verify Google ID token and return user information
         """
         try:
-            # Verify the token
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request(), 
-                self.client_id
-            )
-            
+            certs = await self.cert_cache.get_certs()
+
+            # Unknown key id means Google rotated keys before our copy expired
+            # (or a forged token: the refresh is throttled and decode rejects it)
+            key_id = google_jwt.decode_header(token).get("kid")
+            if key_id and key_id not in certs:
+                certs = await self.cert_cache.refresh(force=True)
+
+            # Verify the token locally against the cached certificates
+            idinfo = google_jwt.decode(token, certs=certs, audience=self.client_id)
+            if idinfo["iss"] not in GOOGLE_ISSUERS:
+                raise GoogleAuthError(f"Wrong issuer: {idinfo['iss']}")
+
             # Extract user information
             user_info = {
                 "email": idinfo["email"],
@@ -29,9 +148,9 @@ class GoogleAuthService:
                 "google_id": idinfo["sub"],
                 "email_verified": idinfo.get("email_verified", False)
             }
-            
+
             return user_info
-            
+
         except GoogleAuthError as e:
             raise ValueError(f"Invalid Google token: {str(e)}")
         except Exception as e:
@@ -39,4 +158,4 @@ class GoogleAuthService:
 
 
 # Create a global instance
-google_auth_service = GoogleAuthService() 
\ No newline at end of file
+google_auth_service = GoogleAuthService()
@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+from .config import settings
+from .tracing import tracer
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool cannot accept more work"""
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+# Module-level so they can be pickled into a process pool
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _bcrypt_rounds(hashed_password: str) -> Optional[int]:
+    # $2b$12$<salt+hash>
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    valid, new_hash = _context(rounds).verify_and_update(password, hashed_password)
+    # Only ever raise the cost, so a process configured lower can't downgrade stored hashes
+    stored_rounds = _bcrypt_rounds(hashed_password)
+    if new_hash is not None and stored_rounds is not None and stored_rounds >= rounds:
+        new_hash = None
+    return valid, new_hash
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 15) -> int:
+    """Return the highest bcrypt cost whose hash time stays within target_ms"""
+    rounds = min_rounds
+    # Untimed first call so backend loading doesn't skew the measurement
+    _hash("calibration-password", min_rounds)
+    for candidate in range(min_rounds, max_rounds + 1):
+        start = time.perf_counter()
+        _hash("calibration-password", candidate)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > target_ms:
+            break
+        rounds = candidate
+    return rounds
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing/verification on a dedicated executor.
+
+    At most max_workers + queue_size operations are admitted at once; anything
+    beyond that fails fast with PasswordHasherBusy instead of piling up behind
+    the pool. The executor is created lazily so it is never shared across forks.
+    """
+
+    def __init__(self, executor_type: str, max_workers: int, queue_size: int, rounds: int):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor_type}")
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max_workers + queue_size
+        self.rounds = rounds
+        self.calibrated = False
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hasher",
+                )
+        return self._executor
+
+    async def _submit(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing pool is saturated")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        with tracer.span("bcrypt.hash", rounds=self.rounds):
+            return await self._submit(_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        valid, _ = await self.verify_and_update(password, hashed_password)
+        return valid
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password, returning a new hash if the stored one uses a lower cost"""
+        with tracer.span("bcrypt.verify", rounds=self.rounds):
+            return await self._submit(_verify_and_update, password, hashed_password, self.rounds)
+
+    async def warm_up(self):
+        """Start the executor's workers and load the bcrypt backend before the first login"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        # Cheapest cost bcrypt accepts; one call per worker so a process pool spawns them all
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _hash, "warm-up-password", 4)
+            for _ in range(self.max_workers)
+        ))
+
+    def calibrate(self, target_ms: float) -> int:
+        """Blocking; app.server runs it once in the master so every worker forks with the same cost"""
+        self.rounds = calibrate_bcrypt_rounds(target_ms)
+        self.calibrated = True
+        return self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_type,
+            "workers": self.max_workers,
+            "rounds": self.rounds,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
+
+    def reset(self):
+        """Forget an executor inherited from a parent process without shutting it down"""
+        self._executor = None
+        self.pending = 0
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1),
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    rounds=settings.BCRYPT_ROUNDS,
+)
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_NOT_FOUND = 27
+
+# Options that make two indexes with the same key pattern different
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel(
+            [("google_id", ASCENDING)],
+            name="google_id_unique",
+            unique=True,
+            partialFilterExpression={"google_id": {"$type": "string"}}
+        ),
+    ],
+    "tournament_registrations": [
+        IndexModel(
+            [("tournament_id", ASCENDING), ("user_id", ASCENDING)],
+            name="tournament_user_unique",
+            unique=True
+        ),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Keyset pagination of a tournament's registrations
+        IndexModel([("tournament_id", ASCENDING), ("_id", ASCENDING)], name="tournament_id_page"),
+    ],
+    "cube_proposals": [
+        IndexModel([("tournament_id", ASCENDING), ("status", ASCENDING)], name="tournament_status"),
+        IndexModel([("tournament_id", ASCENDING), ("_id", ASCENDING)], name="tournament_id_page"),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+    ],
+}
+
+
+class IndexSetupError(Exception):
+    """Some declared indexes could not be built"""
+
+
+def _key(index_info: dict) -> list:
+    return [(field, direction) for field, direction in index_info["key"]]
+
+
+def _matches(existing: dict, wanted: dict) -> bool:
+    if _key(existing) != list(wanted["key"].items()):
+        return False
+    return all(existing.get(option) == wanted.get(option) for option in _COMPARED_OPTIONS)
+
+
+async def _drop_index(collection, name: str):
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as e:
+        # Already dropped, e.g. by a concurrent rebuild
+        if e.code != INDEX_NOT_FOUND:
+            raise
+
+
+async def ensure_indexes(database, rebuild: bool = False) -> dict:
+    """
+    Create the missing declared indexes.
+
+    An existing index whose options differ from the declaration, or that
+    covers the same key pattern under another name, has drifted. Every worker
+    runs this at startup, so drift is only reported there: dropping a unique
+    index would leave a window without the guarantee. rebuild=True (the
+    python -m app.indexes CLI) drops and rebuilds drifted indexes.
+    Returns the names of the indexes created per collection; raises
+    IndexSetupError when a collection's indexes could not be created.
+    """
+    created = {}
+    failures = []
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        existing = await collection.index_information()
+        to_create = []
+
+        for index in indexes:
+            wanted = index.document
+            name = wanted["name"]
+            current = existing.get(name)
+            if current is not None and _matches(current, wanted):
+                continue
+
+            drifted = [name] if current is not None else []
+            drifted += [
+                other_name for other_name, other in existing.items()
+                if other_name not in (name, "_id_") and _key(other) == list(wanted["key"].items())
+            ]
+            if drifted and not rebuild:
+                logger.warning(
+                    "Index %s.%s drifted (existing: %s); run python -m app.indexes to rebuild it",
+                    collection_name, name, ", ".join(drifted)
+                )
+                continue
+            for drifted_name in drifted:
+                await _drop_index(collection, drifted_name)
+            to_create.append(index)
+
+        if to_create:
+            try:
+                created[collection_name] = await collection.create_indexes(to_create)
+            except OperationFailure as e:
+                # Usually duplicate data blocking a unique index. The other
+                # collections are still indexed before giving up
+                logger.error("Failed to create indexes on %s: %s", collection_name, e)
+                failures.append(f"{collection_name}: {e}")
+    if failures:
+        raise IndexSetupError("; ".join(failures))
+    return created
+
+
+async def main():
+    from .database import connect_to_mongo, close_mongo_connection, get_db
+
+    await connect_to_mongo()
+    try:
+        created = await ensure_indexes(await get_db(), rebuild=True)
+    except IndexSetupError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    finally:
+        await close_mongo_connection()
+
+    for collection_name, names in created.items():
+        print(f"✅ {collection_name}: {', '.join(names)}")
+    if not created:
+        print("✅ Indexes already up to date")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
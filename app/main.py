@@ -1,12 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from .auth import get_metrics_access
+from .cache import STALE_HEADER
 from .database import connect_to_mongo, close_mongo_connection
-from .routers import auth, users, tournaments, cubes
+from .hashing import password_hasher, PasswordHasherBusy
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render as render_metrics, worker_snapshots
+from .outbox import outbox_worker
+from .profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+from .pagination import NEXT_CURSOR_HEADER
+from .serialization import JSONResponse
+from .slow_queries import QueryContextMiddleware
+from .tracing import TRACEPARENT_HEADER, TracingMiddleware, tracer
+from .warmup import readiness, warm_up
+from .routers import auth, users, tournaments, cubes, admin
 
 app = FastAPI(
     title="FNDC Tournament System API",
     description="API for managing Magic: The Gathering tournaments and cube proposals",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=JSONResponse
 )
 
 # CORS middleware
@@ -16,13 +29,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Age", STALE_HEADER, TRACEPARENT_HEADER, PROFILE_ID_HEADER],
 )
 
+# Innermost of ours: profiles cover routing, dependencies and the endpoint
+app.add_middleware(ProfilingMiddleware)
+# Lets slow MongoDB commands be attributed to the route that issued them
+app.add_middleware(QueryContextMiddleware)
+# Root span per sampled request, continuing an incoming traceparent
+app.add_middleware(TracingMiddleware)
+# Outermost, so it times the whole request including CORS handling
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(tournaments.router)
 app.include_router(cubes.router)
+app.include_router(admin.router)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.on_event("startup")
@@ -34,11 +67,22 @@ async def startup_event():
         print(f"❌ Failed to connect to MongoDB: {e}")
         # En producción, podrías querer hacer exit(1) aquí
         # pero para desarrollo, continuamos
+    
+    outbox_worker.start()
+    tracer.start()
+    worker_snapshots.start()
+    # Runs in the background so /health answers while /ready reports progress
+    app.state.warmup_task = asyncio.create_task(warm_up())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.warmup_task.cancel()
+    await outbox_worker.stop()
+    await tracer.stop()
+    await worker_snapshots.stop()
     await close_mongo_connection()
+    password_hasher.shutdown()
 
 
 @app.get("/")
@@ -52,4 +96,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    """Liveness: the process is up, whether or not it can serve yet"""
+    return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until the warm-up (MongoDB, indexes, Google keys, bcrypt) has completed"""
+    return JSONResponse(readiness.snapshot(), status_code=200 if readiness.ready else 503) 
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(_=Depends(get_metrics_access)):
+    """Prometheus text format (METRICS_TOKEN or an admin bearer token)"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,411 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+from .cache import principal_cache, response_cache
+from .config import settings
+from .hashing import password_hasher
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_worker_label = ""
+
+
+def _set_worker_label():
+    global _worker_label
+    _worker_label = f'pid="{os.getpid()}"'
+
+
+_set_worker_label()
+# gunicorn forks the workers from the preloaded master
+os.register_at_fork(after_in_child=_set_worker_label)
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    pairs.append(_worker_label)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # The pymongo listeners observe from Motor's executor threads
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Sample lines in the text exposition format"""
+
+    def family(self) -> list:
+        return [self.name, self.documentation, self.type, list(self.samples())]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class CallbackMetric(Metric):
+    """Read at scrape time from state owned elsewhere, e.g. cache statistics"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        function: Callable[[], Iterable[Tuple[Sequence[str], float]]]
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.type = metric_type
+        self.function = function
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.function():
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def families(self) -> List[list]:
+        return [metric.family() for metric in self._metrics]
+
+
+registry = Registry()
+
+
+class WorkerSnapshots:
+    """Shares each worker's samples through a directory so any worker can answer for all"""
+
+    def __init__(self, registry: Registry, directory: Optional[str], interval: float):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    def write(self):
+        path = self._path()
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.registry.families(), f)
+        # Readers never see a half-written file
+        os.replace(path + ".tmp", path)
+
+    def families(self) -> List[list]:
+        """This worker's live samples, plus the latest snapshot of every other worker"""
+        merged = {family[0]: family for family in self.registry.families()}
+        if not self.directory:
+            return list(merged.values())
+
+        own = os.path.basename(self._path())
+        # A worker that hasn't written for a few intervals is gone
+        cutoff = time.time() - 3 * self.interval
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json") or entry.name == own:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    continue
+                with open(entry.path) as f:
+                    families = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, documentation, metric_type, samples in families:
+                merged.setdefault(name, [name, documentation, metric_type, []])[3].extend(samples)
+        return list(merged.values())
+
+    def start(self):
+        if self.directory and self._task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.write)
+            except OSError:
+                logger.exception("Failed to write the metrics snapshot to %s", self.directory)
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            os.remove(self._path())
+        except FileNotFoundError:
+            pass
+
+
+worker_snapshots = WorkerSnapshots(
+    registry,
+    directory=settings.METRICS_MULTIPROC_DIR,
+    interval=settings.METRICS_SNAPSHOT_INTERVAL_SECONDS,
+)
+
+
+def render() -> str:
+    lines = []
+    for name, documentation, metric_type, samples in worker_snapshots.families():
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}", *samples]
+    return "\n".join(lines) + "\n"
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+mongo_command_duration = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time",
+    ("command", "collection"), MONGO_BUCKETS
+))
+mongo_command_failures = registry.register(Counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error", ("command", "collection")
+))
+mongo_pool_connections = registry.register(Gauge(
+    "mongodb_pool_connections", "Pooled MongoDB connections by state", ("state",)
+))
+mongo_pool_checkout_duration = registry.register(Histogram(
+    "mongodb_pool_checkout_duration_seconds", "Time spent waiting for a pooled connection", (), MONGO_BUCKETS
+))
+mongo_pool_checkout_failures = registry.register(Counter(
+    "mongodb_pool_checkout_failures_total", "Failed connection checkouts by reason", ("reason",)
+))
+
+
+def _route_label(scope: dict) -> str:
+    # The route template keeps label cardinality bounded (no ids in paths)
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses aren't buffered"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            method = scope["method"]
+            route = _route_label(scope)
+            http_requests.inc(method=method, route=route, status=status_code)
+            http_request_duration.observe(elapsed, method=method, route=route)
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Times every MongoDB command; pymongo calls it from Motor's executor threads"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else ""
+        )
+
+    def _collection(self, event) -> str:
+        return self._collections.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        mongo_command_duration.observe(
+            event.duration_micros / 1_000_000, command=event.command_name, collection=self._collection(event)
+        )
+
+    def failed(self, event):
+        collection = self._collection(event)
+        mongo_command_duration.observe(event.duration_micros / 1_000_000, command=event.command_name, collection=collection)
+        mongo_command_failures.inc(command=event.command_name, collection=collection)
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(state="open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(state="open")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc(reason=event.reason)
+
+    def connection_checked_out(self, event):
+        mongo_pool_connections.inc(state="in_use")
+        mongo_pool_checkout_duration.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        mongo_pool_connections.dec(state="in_use")
+
+
+def mongo_event_listeners() -> list:
+    return [CommandMetricsListener(), PoolMetricsListener()]
+
+
+def _cache_stats() -> Dict[str, dict]:
+    return {"principal": principal_cache.stats(), "response": response_cache.stats()}
+
+
+def _cache_values(field: str) -> Callable:
+    def collect():
+        return [((name,), stats[field]) for name, stats in _cache_stats().items()]
+    return collect
+
+
+def _hasher_value(field: str) -> Callable:
+    def collect():
+        return [((), password_hasher.stats()[field])]
+    return collect
+
+
+registry.register(CallbackMetric("cache_hits_total", "Cache lookups served from memory", "counter", ("cache",), _cache_values("hits")))
+registry.register(CallbackMetric("cache_misses_total", "Cache lookups that missed", "counter", ("cache",), _cache_values("misses")))
+registry.register(CallbackMetric("cache_hit_ratio", "Cache hits over lookups since start", "gauge", ("cache",), _cache_values("hit_ratio")))
+registry.register(CallbackMetric("cache_entries", "Entries currently cached", "gauge", ("cache",), _cache_values("size")))
+registry.register(CallbackMetric(
+    "password_hasher_pending", "bcrypt operations running or queued", "gauge", (), _hasher_value("pending")
+))
+registry.register(CallbackMetric(
+    "password_hasher_rejected_total", "bcrypt operations rejected because the pool was saturated", "counter", (),
+    _hasher_value("rejected")
+))
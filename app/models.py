@@ -14,6 +14,15 @@ class CubeStatus(str, Enum):
     HABILITADO = "habilitado"
 
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class Expand(str, Enum):
+    USER = "user"
+
+
 class UserBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     email: EmailStr
@@ -44,6 +53,14 @@ class UserInDB(User):
     hashed_password: Optional[str] = None
 
 
+class PublicUser(BaseModel):
+    """Public profile embedded in other resources with expand=user"""
+    id: str
+    name: str
+    picture: Optional[str] = None
+    preferred_cube: Optional[str] = None
+
+
 class TournamentBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=200)
     date: datetime
@@ -62,6 +79,10 @@ class Tournament(TournamentBase):
     created_by: str
     created_at: datetime
     updated_at: datetime
+    # Denormalised counters, see app/counters.py
+    registration_count: int = 0
+    proposal_count: int = 0
+    enabled_cube_count: int = 0
 
 
 class CubeProposalBase(BaseModel):
@@ -80,6 +101,7 @@ class CubeProposal(CubeProposalBase):
     status: CubeStatus = CubeStatus.PROPUESTO
     created_at: datetime
     updated_at: datetime
+    user: Optional[PublicUser] = None
 
 
 class TournamentRegistration(BaseModel):
@@ -87,6 +109,64 @@ class TournamentRegistration(BaseModel):
     tournament_id: str
     user_id: str
     registered_at: datetime
+    user: Optional[PublicUser] = None
+
+
+class TournamentOverview(BaseModel):
+    tournament: Tournament
+    registration_count: int
+    enabled_cubes: List[CubeProposal]
+    # None for anonymous callers
+    is_registered: Optional[bool] = None
+
+
+class CubeStatusChange(BaseModel):
+    proposal_id: str
+    status: CubeStatus
+
+
+class BulkCubeStatusUpdate(BaseModel):
+    items: List[CubeStatusChange] = Field(..., min_length=1, max_length=500)
+    ordered: bool = Field(False, description="Stop at the first failing item")
+
+
+class UserRoleChange(BaseModel):
+    user_id: str
+    role: UserRole
+
+
+class BulkRoleUpdate(BaseModel):
+    items: List[UserRoleChange] = Field(..., min_length=1, max_length=500)
+    ordered: bool = Field(False, description="Stop at the first failing item")
+
+
+class RegistrationImport(BaseModel):
+    emails: List[EmailStr] = Field(..., min_length=1, max_length=1000)
+    ordered: bool = Field(False, description="Stop at the first failing item")
+
+
+class BulkItemStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    NOT_FOUND = "not_found"
+    INVALID = "invalid"
+    DUPLICATE = "duplicate"
+    ERROR = "error"
+    SKIPPED = "skipped"
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: BulkItemStatus
+    detail: Optional[str] = None
+
+
+class BulkOperationResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
 
 
 class Token(BaseModel):
@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, UTC
+from typing import List, Optional
+import resend
+from .config import settings
+from .database import get_db
+from .tracing import current_span, tracer
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxStatus:
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailTransport(ABC):
+    """Delivers a single outbox message"""
+
+    @abstractmethod
+    async def send(self, message: dict) -> Optional[str]:
+        """Send the message and return the provider's message id, if any"""
+
+
+class ResendTransport(EmailTransport):
+    def __init__(self, api_key: str):
+        resend.api_key = api_key
+
+    async def send(self, message: dict) -> Optional[str]:
+        # The Resend SDK is synchronous, keep it off the event loop
+        response = await asyncio.to_thread(resend.Emails.send, {
+            "from": message["from"],
+            "to": message["to"],
+            "subject": message["subject"],
+            "html": message["html"]
+        })
+        return response.get("id") if isinstance(response, dict) else None
+
+
+class FakeTransport(EmailTransport):
+    """Keeps messages in memory instead of sending them (tests and benchmarks)"""
+
+    def __init__(self, latency: float = 0.0, fail_times: int = 0):
+        self.latency = latency
+        self.fail_times = fail_times
+        self.sent: List[dict] = []
+
+    async def send(self, message: dict) -> Optional[str]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("Simulated delivery failure")
+        self.sent.append(message)
+        return f"fake-{len(self.sent)}"
+
+
+def create_transport(name: str) -> EmailTransport:
+    if name == "resend":
+        return ResendTransport(settings.RESEND_API_KEY)
+    if name == "fake":
+        return FakeTransport()
+    raise ValueError(f"Unknown email transport: {name}")
+
+
+async def enqueue_email(to: List[str], subject: str, html: str, kind: str, sender: str = "noreply@fndc.com") -> str:
+    """Store a message in the outbox; the worker delivers it later"""
+    db = await get_db()
+    now = datetime.now(UTC)
+    span = current_span.get()
+    message = {
+        "kind": kind,
+        "from": sender,
+        "to": to,
+        "subject": subject,
+        "html": html,
+        "status": OutboxStatus.PENDING,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now
+    }
+    if span is not None:
+        # The delivery span joins the trace of the request that queued it
+        message["traceparent"] = span.traceparent
+    with tracer.span("email.enqueue", **{"email.kind": kind}):
+        result = await db.email_outbox.insert_one(message)
+    return str(result.inserted_id)
+
+
+class OutboxWorker:
+    """
+    Background task that delivers queued emails.
+
+    A batch is claimed with one update_many that re-checks each message is
+    still claimable, so several workers (or processes) can drain the same
+    outbox without sending twice. A claim is a lease and counts an attempt:
+    if the worker dies mid-send the message becomes claimable again once
+    lease_seconds have passed, until max_attempts is reached.
+    """
+
+    def __init__(
+        self,
+        transport: EmailTransport,
+        batch_size: int = 20,
+        concurrency: int = 5,
+        max_attempts: int = 5,
+        base_backoff: float = 30,
+        max_backoff: float = 3600,
+        poll_interval: float = 2,
+        lease_seconds: float = 120
+    ):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Wake the worker up early, e.g. right after enqueueing a message"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                delivered = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error processing the email outbox")
+                delivered = 0
+
+            # A full batch probably means more work is waiting
+            if delivered < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def claim_batch(self) -> List[dict]:
+        db = await get_db()
+        now = datetime.now(UTC)
+        claimable = {"$or": [
+            {"status": OutboxStatus.PENDING, "next_attempt_at": {"$lte": now}},
+            {"status": OutboxStatus.SENDING, "lease_until": {"$lte": now}, "attempts": {"$lt": self.max_attempts}}
+        ]}
+        # The worker died on the last attempt (e.g. a message that crashes it): don't retry forever
+        await db.email_outbox.update_many(
+            {"status": OutboxStatus.SENDING, "lease_until": {"$lte": now}, "attempts": {"$gte": self.max_attempts}},
+            {
+                "$set": {"status": OutboxStatus.FAILED, "last_error": "Lease expired on the last attempt", "updated_at": now},
+                "$unset": {"lease_until": "", "claim_id": ""}
+            }
+        )
+
+        cursor = db.email_outbox.find(claimable, {"_id": 1}).sort("next_attempt_at", 1).limit(self.batch_size)
+        candidates = [message["_id"] async for message in cursor]
+        if not candidates:
+            return []
+
+        # Re-checking claimable in the update keeps each claim atomic: if
+        # another worker took a candidate first, it just isn't ours
+        claim_id = uuid.uuid4().hex
+        await db.email_outbox.update_many(
+            {"_id": {"$in": candidates}, **claimable},
+            {
+                "$set": {
+                    "status": OutboxStatus.SENDING,
+                    "lease_until": now + timedelta(seconds=self.lease_seconds),
+                    "claim_id": claim_id,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            }
+        )
+        return await db.email_outbox.find({"_id": {"$in": candidates}, "claim_id": claim_id}).to_list(None)
+
+    async def process_batch(self) -> int:
+        messages = await self.claim_batch()
+        if not messages:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver_with_limit(message: dict):
+            async with semaphore:
+                await self._deliver(message)
+
+        await asyncio.gather(*(deliver_with_limit(message) for message in messages))
+        return len(messages)
+
+    async def _deliver(self, message: dict):
+        db = await get_db()
+        # Counted when claimed, so a send that kills the worker still uses up an attempt
+        attempts = message["attempts"]
+        # Only while our lease holds: once it expires another worker may have claimed the message
+        claim = {"_id": message["_id"], "claim_id": message["claim_id"], "lease_until": message["lease_until"]}
+        try:
+            with tracer.start_trace(
+                "email.send", message.get("traceparent"), "client",
+                **{"email.kind": message.get("kind", ""), "email.attempt": attempts}
+            ):
+                provider_id = await self.transport.send(message)
+        except Exception as e:
+            now = datetime.now(UTC)
+            update = {"last_error": str(e), "updated_at": now}
+            if attempts >= self.max_attempts:
+                update["status"] = OutboxStatus.FAILED
+                logger.warning("Giving up on email %s after %d attempts: %s", message["_id"], attempts, e)
+            else:
+                delay = min(self.base_backoff * 2 ** (attempts - 1), self.max_backoff)
+                update["status"] = OutboxStatus.PENDING
+                update["next_attempt_at"] = now + timedelta(seconds=delay)
+            await db.email_outbox.update_one(claim, {"$set": update, "$unset": {"lease_until": "", "claim_id": ""}})
+            return
+
+        now = datetime.now(UTC)
+        await db.email_outbox.update_one(
+            claim,
+            {
+                "$set": {
+                    "status": OutboxStatus.SENT,
+                    "provider_id": provider_id,
+                    "sent_at": now,
+                    "updated_at": now
+                },
+                "$unset": {"lease_until": "", "claim_id": "", "last_error": ""}
+            }
+        )
+
+outbox_worker = OutboxWorker(
+    transport=create_transport(settings.EMAIL_TRANSPORT),
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    concurrency=settings.EMAIL_OUTBOX_CONCURRENCY,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_INTERVAL_SECONDS
+)
@@ -0,0 +1,66 @@
+import base64
+import json
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from .config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: str) -> str:
+    payload = json.dumps({"after": str(last_id)}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return ObjectId(payload["after"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid pagination cursor")
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Apply the default page size and the server-side maximum"""
+    if limit is None:
+        return settings.PAGE_SIZE_DEFAULT
+    return max(1, min(limit, settings.PAGE_SIZE_MAX))
+
+
+async def paginate(
+    collection,
+    query: dict,
+    projection: dict,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Fetch one page of documents ordered by _id (keyset pagination).
+
+    projection is a $project stage body that must emit "id", usually from
+    serialization.model_projection; documents come back without _id. One
+    extra document is read to know whether another page exists; the
+    returned cursor is None on the last page.
+    """
+    if cursor:
+        query = {**query, "_id": {"$gt": decode_cursor(cursor)}}
+
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"_id": 1}},
+        {"$limit": limit + 1},
+        {"$project": projection},
+    ]
+    documents = await collection.aggregate(pipeline).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1]["id"])
+    return documents, next_cursor
+
+
+def next_cursor_headers(next_cursor: Optional[str]) -> dict:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
@@ -0,0 +1,245 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, UTC
+from typing import List, Optional
+from fastapi import HTTPException
+from .auth import get_current_admin_user, get_current_user
+from .config import settings
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+MODES = ("cprofile", "sampling")
+HOT_FRAMES = 25
+
+
+def _location(filename: str, lineno: int) -> str:
+    # Last two path components: app/crud.py, pydantic/main.py, ...
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    return f"{'/'.join(parts[-2:])}:{lineno}"
+
+
+class StackSampler:
+    """Samples the calling thread's stack every interval from a helper thread"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_location(code.co_filename, code.co_firstlineno)})")
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """One "root;...;leaf count" line per distinct stack (flamegraph.pl / speedscope)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def hot_frames(self) -> List[dict]:
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [
+            {
+                "function": frame,
+                "own_samples": count,
+                "total_samples": total[frame],
+                "own_pct": round(100 * count / self.samples, 1),
+            }
+            for frame, count in own.most_common(HOT_FRAMES)
+        ]
+
+
+def _pstats_hot_frames(stats: pstats.Stats) -> List[dict]:
+    rows = []
+    for (filename, lineno, name), (calls, _, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({_location(filename, lineno)})" if lineno else name,
+            "calls": calls,
+            "own_ms": round(tottime * 1000, 3),
+            "total_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: -row["own_ms"])
+    return rows[:HOT_FRAMES]
+
+
+class Profile:
+    def __init__(self, mode: str, trigger: str, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.trigger = trigger
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.at = datetime.now(UTC)
+        self.duration_ms: Optional[float] = None
+        self.hot_frames: List[dict] = []
+        # pstats (marshalled, like Stats.dump_stats) or collapsed stacks
+        self.data: bytes = b""
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "trigger": self.trigger,
+            "method": self.method,
+            "route": self.route or self.path,
+            "status": self.status,
+            "at": self.at.isoformat(),
+            "duration_ms": self.duration_ms,
+        }
+
+
+class RequestProfiler:
+    """Keeps the last max_stored profiles of this worker"""
+
+    def __init__(self, max_stored: int, sample_rate: float, default_mode: str, sampling_interval_ms: float):
+        if default_mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {default_mode}")
+        self.sample_rate = sample_rate
+        self.default_mode = default_mode
+        self.sampling_interval = sampling_interval_ms / 1000
+        self.profiles: deque = deque(maxlen=max_stored)
+        # cProfile can only run once per thread, and overlapping profiles would measure each other
+        self.lock = asyncio.Lock()
+        self.skipped = 0
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def list(self) -> List[dict]:
+        """Newest first"""
+        return [profile.summary() for profile in reversed(self.profiles)]
+
+    def clear(self):
+        self.profiles.clear()
+
+    async def run(self, profile: Profile, call):
+        start = time.perf_counter()
+        if profile.mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await call()
+            finally:
+                profiler.disable()
+                profile.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+                stats = pstats.Stats(profiler, stream=io.StringIO())
+                profile.hot_frames = _pstats_hot_frames(stats)
+                profile.data = marshal.dumps(stats.stats)
+                self.profiles.append(profile)
+        else:
+            sampler = StackSampler(self.sampling_interval)
+            sampler.start()
+            try:
+                await call()
+            finally:
+                sampler.stop()
+                profile.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+                profile.hot_frames = sampler.hot_frames()
+                profile.data = sampler.collapsed().encode()
+                self.profiles.append(profile)
+
+
+request_profiler = RequestProfiler(
+    max_stored=settings.PROFILE_MAX_STORED,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    default_mode=settings.PROFILE_MODE,
+    sampling_interval_ms=settings.PROFILE_SAMPLING_INTERVAL_MS,
+)
+
+
+async def _is_admin(headers: dict) -> bool:
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        await get_current_admin_user(await get_current_user(token))
+    except HTTPException:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware deciding which requests run under a profiler"""
+
+    def __init__(self, app, profiler: RequestProfiler = request_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def _mode(self, scope) -> Optional[tuple]:
+        headers = dict(scope["headers"])
+        requested = headers.get(PROFILE_HEADER.lower().encode())
+        if requested is not None:
+            mode = requested.decode("latin-1").strip().lower()
+            # The header is ignored for anyone but an admin
+            if await _is_admin(headers):
+                return (mode if mode in MODES else self.profiler.default_mode), "header"
+            return None
+        if self.profiler.sample_rate and random.random() < self.profiler.sample_rate:
+            return self.profiler.default_mode, "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        selected = await self._mode(scope)
+        if selected is None:
+            await self.app(scope, receive, send)
+            return
+        if self.profiler.lock.locked():
+            self.profiler.skipped += 1
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(*selected, scope["method"], scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.lower().encode(), profile.id.encode())
+                ]
+            await send(message)
+
+        async with self.profiler.lock:
+            try:
+                await self.profiler.run(profile, lambda: self.app(scope, receive, send_wrapper))
+            finally:
+                route = scope.get("route")
+                profile.route = getattr(route, "path", None)
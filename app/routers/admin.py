@@ -0,0 +1,67 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from ..auth import get_current_admin_user
+from ..profiling import request_profiler
+from ..serialization import json_response
+from ..slow_queries import slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: Optional[int] = Query(None, ge=1),
+    collscan: bool = Query(False, description="Only entries whose explained plan is a collection scan"),
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Most recent slow MongoDB operations of this worker, newest first (admin only)"""
+    entries = slow_query_log.entries()
+    if collscan:
+        entries = [entry for entry in entries if (entry["explain"] or {}).get("collscan")]
+    return json_response({**slow_query_log.stats(), "entries": entries[:limit] if limit else entries})
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(current_admin: dict = Depends(get_current_admin_user)):
+    """Empty the slow query log of this worker (admin only)"""
+    slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
+
+
+@router.get("/profiles")
+async def get_profiles(current_admin: dict = Depends(get_current_admin_user)):
+    """Profiles stored by this worker, newest first (admin only)"""
+    return json_response({"skipped": request_profiler.skipped, "profiles": request_profiler.list()})
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, current_admin: dict = Depends(get_current_admin_user)):
+    """Summary and hottest frames of a profile (admin only)"""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return json_response({**profile.summary(), "hot_frames": profile.hot_frames})
+
+
+@router.get("/profiles/{profile_id}/download")
+async def download_profile(profile_id: str, current_admin: dict = Depends(get_current_admin_user)):
+    """Raw profile: a .prof file for pstats/snakeviz, or collapsed stacks for flame graphs (admin only)"""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if profile.mode == "cprofile":
+        filename, media_type = f"{profile.id}.prof", "application/octet-stream"
+    else:
+        filename, media_type = f"{profile.id}.folded", "text/plain; charset=utf-8"
+    return Response(
+        profile.data,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.delete("/profiles")
+async def clear_profiles(current_admin: dict = Depends(get_current_admin_user)):
+    """Drop the profiles stored by this worker (admin only)"""
+    request_profiler.clear()
+    return {"message": "Profiles cleared"}
@@ -2,8 +2,9 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from ..models import UserCreate, Token, PasswordReset, PasswordResetConfirm, EmailVerification, GoogleToken
-from ..auth import create_access_token, get_current_user, get_password_hash
-from ..crud import create_user, authenticate_user, get_user_by_email, verify_user_email, update_user_password, get_user_by_google_id, create_google_user
+from ..auth import create_access_token, get_current_user
+from ..hashing import password_hasher, PasswordHasherBusy
+from ..crud import create_user, authenticate_user, get_user_by_email, verify_user_email, update_user_password, upsert_google_user
 from ..email_service import email_service
 from ..google_auth import google_auth_service
 from ..config import settings
@@ -59,8 +60,8 @@ async def verify_email(verification: EmailVerification):
     if not email:
         raise HTTPException(status_code=400, detail="Invalid or expired verification token")
     
-    success = await verify_user_email(email)
-    if not success:
+    user = await verify_user_email(email)
+    if not user:
         raise HTTPException(status_code=400, detail="User not found")
     
     return {"message": "Email verified successfully"}
@@ -108,19 +109,8 @@ async def google_auth(google_token: GoogleToken):
         # Verify Google token and get user info
         user_info = await google_auth_service.verify_google_token(google_token.token)
         
-        # Check if user exists by Google ID
-        user = await get_user_by_google_id(user_info["google_id"])
-        
-        if not user:
-            # Check if user exists by email (for linking existing accounts)
-            user = await get_user_by_email(user_info["email"])
-            
-            if user:
-                # Link existing account with Google
-                user = await create_google_user(user_info)
-            else:
-                # Create new Google user
-                user = await create_google_user(user_info)
+        # Find, link (existing email account) or create the user in one query
+        user = await upsert_google_user(user_info)
         
         # Create access token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -148,32 +138,30 @@ async def google_auth(google_token: GoogleToken):
 async def create_admin_user(admin_data: UserCreate):
     """Create an admin user (DEVELOPMENT ONLY)"""
     try:
-        # Verificar si ya existe un admin (opcional, para seguridad)
-        from ..crud import get_user_by_email
-        existing_admin = await get_user_by_email(admin_data.email)
-        if existing_admin:
-            raise HTTPException(status_code=400, detail="User already exists")
-        
         # Crear usuario admin
         from datetime import datetime, UTC
-        from ..auth import get_password_hash
+        from pymongo.errors import DuplicateKeyError
         from ..models import UserRole
-        from ..database import get_database
+        from ..database import get_db
         
-        db = await get_database()
+        db = await get_db()
         now = datetime.now(UTC)
         
         admin_user = {
             "email": admin_data.email,
             "name": admin_data.name,
-            "hashed_password": get_password_hash(admin_data.password),
+            "hashed_password": await password_hasher.hash(admin_data.password),
             "role": UserRole.ADMIN,
             "is_verified": True,
             "created_at": now,
             "updated_at": now
         }
         
-        result = await db.fndc.users.insert_one(admin_user)
+        # El índice único de email detecta usuarios existentes
+        try:
+            result = await db.users.insert_one(admin_user)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="User already exists")
         admin_user["id"] = str(result.inserted_id)
         
         return {
@@ -183,7 +171,7 @@ async def create_admin_user(admin_data: UserCreate):
             "role": admin_user["role"]
         }
         
-    except HTTPException:
+    except (HTTPException, PasswordHasherBusy):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating admin user: {str(e)}") 
\ No newline at end of file
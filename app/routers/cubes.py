@@ -1,12 +1,15 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from ..models import CubeProposalCreate, CubeProposal, CubeStatus
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from ..models import CubeProposalCreate, CubeProposal, CubeStatus, Expand, BulkCubeStatusUpdate, BulkOperationResult
 from ..auth import get_current_active_user, get_current_admin_user
 from ..crud import (
     create_cube_proposal, get_cube_proposals_by_tournament,
     get_enabled_cubes_by_tournament, update_cube_status,
-    get_tournament_by_id
+    get_tournament_by_id, expand_users, bulk_update_cube_status
 )
+from ..cache import cached_json_response
+from ..pagination import next_cursor_headers, page_size
+from ..serialization import FIELDS_DESCRIPTION, construct, construct_one, dumps, fields_key, json_response, parse_fields
 
 router = APIRouter(prefix="/cubes", tags=["cubes"])
 
@@ -32,31 +35,64 @@ async def propose_cube(
 
 # Public endpoints (no authentication required)
 @router.get("/tournament/{tournament_id}/enabled", response_model=List[CubeProposal])
-async def get_enabled_cubes(tournament_id: str):
-    """Get all enabled cubes for a tournament (Public)"""
-    # Check if tournament exists
-    tournament = await get_tournament_by_id(tournament_id)
-    if not tournament:
-        raise HTTPException(status_code=404, detail="Tournament not found")
+async def get_enabled_cubes(
+    request: Request,
+    tournament_id: str,
+    expand: Optional[Expand] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """Get all enabled cubes for a tournament; expand=user embeds the proposer's public profile (Public)"""
+    try:
+        # expand=user needs user_id to look the profiles up
+        selected = parse_fields(CubeProposal, fields, *(("user_id", "user") if expand else ()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    cubes = await get_enabled_cubes_by_tournament(tournament_id)
-    return cubes
+    async def produce():
+        # Check if tournament exists
+        tournament = await get_tournament_by_id(tournament_id)
+        if not tournament:
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        
+        cubes = await get_enabled_cubes_by_tournament(tournament_id, selected)
+        if expand == Expand.USER:
+            await expand_users(cubes)
+        return dumps(construct(CubeProposal, cubes, selected)), {}
+    
+    return await cached_json_response(
+        request,
+        f"cubes:{tournament_id}:enabled:{expand.value if expand else ''}:{fields_key(selected)}",
+        [f"cubes:{tournament_id}"],
+        produce
+    )
 
 
 # Admin endpoints (admin authentication required)
 @router.get("/tournament/{tournament_id}/all", response_model=List[CubeProposal])
 async def get_all_cube_proposals(
     tournament_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    expand: Optional[Expand] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_admin: dict = Depends(get_current_admin_user)
 ):
-    """Get all cube proposals for a tournament (Admin only)"""
+    """Get a page of cube proposals for a tournament; expand=user embeds the proposer's public profile (Admin only)"""
     # Check if tournament exists
     tournament = await get_tournament_by_id(tournament_id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
     
-    proposals = await get_cube_proposals_by_tournament(tournament_id)
-    return proposals
+    try:
+        selected = parse_fields(CubeProposal, fields, *(("user_id", "user") if expand else ()))
+        proposals, next_cursor = await get_cube_proposals_by_tournament(
+            tournament_id, page_size(limit), cursor, selected
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if expand == Expand.USER:
+        await expand_users(proposals)
+    return json_response(construct(CubeProposal, proposals, selected), next_cursor_headers(next_cursor))
 
 
 @router.put("/{proposal_id}/status")
@@ -65,9 +101,18 @@ async def update_cube_proposal_status(
     status: CubeStatus,
     current_admin: dict = Depends(get_current_admin_user)
 ):
-    """Update cube proposal status (Admin only)"""
-    success = await update_cube_status(proposal_id, status)
-    if not success:
+    """Update cube proposal status and return the updated proposal (Admin only)"""
+    proposal = await update_cube_status(proposal_id, status)
+    if not proposal:
         raise HTTPException(status_code=404, detail="Cube proposal not found")
     
-    return {"message": f"Cube proposal status updated to {status}"} 
\ No newline at end of file
+    return {"message": f"Cube proposal status updated to {status}", "proposal": construct_one(CubeProposal, proposal)}
+
+
+@router.put("/status/bulk", response_model=BulkOperationResult)
+async def bulk_update_cube_proposal_status(
+    changes: BulkCubeStatusUpdate,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Update the status of many cube proposals at once, reporting the result of each (Admin only)"""
+    return await bulk_update_cube_status(changes.items, changes.ordered)
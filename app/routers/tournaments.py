@@ -1,15 +1,28 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from ..models import TournamentCreate, Tournament
-from ..auth import get_current_active_user, get_current_admin_user
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from ..models import (
+    TournamentCreate, Tournament, TournamentOverview, TournamentRegistration, CubeProposal,
+    ExportFormat, Expand, RegistrationImport, BulkOperationResult
+)
+from ..auth import get_current_active_user, get_current_admin_user, get_optional_current_user
 from ..crud import (
     create_tournament, get_tournaments, get_tournament_by_id,
     register_user_to_tournament, get_tournament_registrations,
-    check_user_registration
+    check_user_registration, iter_tournament_registrations,
+    get_tournament_overview, expand_users, import_tournament_registrations
+)
+from ..cache import cached_json_response
+from ..config import settings
+from ..export import export_response
+from ..pagination import next_cursor_headers, page_size
+from ..serialization import (
+    FIELDS_DESCRIPTION, construct, construct_one, dumps, fields_key, json_response, parse_fields
 )
 
 router = APIRouter(prefix="/tournaments", tags=["tournaments"])
 
+REGISTRATION_EXPORT_COLUMNS = ["id", "tournament_id", "user_id", "registered_at"]
+
 
 # Admin endpoints
 @router.post("/", response_model=Tournament)
@@ -25,21 +38,85 @@ async def create_new_tournament(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/{tournament_id}/registrations/import", response_model=BulkOperationResult)
+async def import_registrations(
+    tournament_id: str,
+    registration_import: RegistrationImport,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Register many users by email at once, e.g. from a paper sign-up sheet (Admin only)"""
+    # Check if tournament exists
+    tournament = await get_tournament_by_id(tournament_id)
+    if not tournament:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    
+    return await import_tournament_registrations(
+        tournament_id, registration_import.emails, registration_import.ordered
+    )
+
+
 # Public endpoints (no authentication required)
 @router.get("/", response_model=List[Tournament])
-async def list_tournaments():
-    """Get all tournaments (Public)"""
-    tournaments = await get_tournaments()
-    return tournaments
+async def list_tournaments(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """Get a page of tournaments (Public). The next page cursor is returned in X-Next-Cursor"""
+    size = page_size(limit)
+    try:
+        selected = parse_fields(Tournament, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def produce():
+        try:
+            tournaments, next_cursor = await get_tournaments(size, cursor, selected)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return dumps(construct(Tournament, tournaments, selected)), next_cursor_headers(next_cursor)
+    
+    return await cached_json_response(
+        request, f"tournaments:list:{size}:{cursor or ''}:{fields_key(selected)}", ["tournaments"], produce
+    )
 
 
 @router.get("/{tournament_id}", response_model=Tournament)
-async def get_tournament(tournament_id: str):
+async def get_tournament(
+    request: Request,
+    tournament_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
     """Get tournament by ID (Public)"""
-    tournament = await get_tournament_by_id(tournament_id)
-    if not tournament:
+    try:
+        selected = parse_fields(Tournament, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def produce():
+        tournament = await get_tournament_by_id(tournament_id, selected)
+        if not tournament:
+            raise HTTPException(status_code=404, detail="Tournament not found")
+        return dumps(construct_one(Tournament, tournament, selected)), {}
+    
+    return await cached_json_response(
+        request, f"tournament:{tournament_id}:{fields_key(selected)}", [f"tournament:{tournament_id}"], produce
+    )
+
+
+@router.get("/{tournament_id}/overview", response_model=TournamentOverview)
+async def get_tournament_page(
+    tournament_id: str,
+    current_user: Optional[dict] = Depends(get_optional_current_user)
+):
+    """Tournament, registration count, enabled cubes and, with a token, the caller's registration status (Public)"""
+    overview = await get_tournament_overview(tournament_id, current_user["id"] if current_user else None)
+    if not overview:
         raise HTTPException(status_code=404, detail="Tournament not found")
-    return tournament
+    overview["tournament"] = construct_one(Tournament, overview["tournament"])
+    overview["enabled_cubes"] = construct(CubeProposal, overview["enabled_cubes"])
+    return json_response(overview)
 
 
 # Protected endpoints (authentication required)
@@ -64,19 +141,34 @@ async def register_to_tournament(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{tournament_id}/registrations")
+@router.get("/{tournament_id}/registrations", response_model=List[TournamentRegistration])
 async def get_registrations(
     tournament_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    expand: Optional[Expand] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: dict = Depends(get_current_active_user)
 ):
-    """Get all registrations for a tournament (Authentication required)"""
+    """Get a page of registrations for a tournament; expand=user embeds each player's public profile (Authentication required)"""
     # Check if tournament exists
     tournament = await get_tournament_by_id(tournament_id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
     
-    registrations = await get_tournament_registrations(tournament_id)
-    return registrations
+    try:
+        # expand=user needs user_id to look the profiles up
+        selected = parse_fields(TournamentRegistration, fields, *(("user_id", "user") if expand else ()))
+        registrations, next_cursor = await get_tournament_registrations(
+            tournament_id, page_size(limit), cursor, selected
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if expand == Expand.USER:
+        await expand_users(registrations)
+    return json_response(
+        construct(TournamentRegistration, registrations, selected), next_cursor_headers(next_cursor)
+    )
 
 
 @router.get("/{tournament_id}/my-registration")
@@ -91,4 +183,24 @@ async def check_my_registration(
         raise HTTPException(status_code=404, detail="Tournament not found")
     
     is_registered = await check_user_registration(tournament_id, current_user["id"])
-    return {"is_registered": is_registered} 
\ No newline at end of file
+    return {"is_registered": is_registered}
+
+
+@router.get("/{tournament_id}/registrations/export")
+async def export_registrations(
+    tournament_id: str,
+    format: ExportFormat = ExportFormat.NDJSON,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Stream every registration of a tournament as NDJSON or CSV (Admin only)"""
+    # Check if tournament exists
+    tournament = await get_tournament_by_id(tournament_id)
+    if not tournament:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    
+    return export_response(
+        iter_tournament_registrations(tournament_id, settings.EXPORT_BATCH_SIZE),
+        format,
+        REGISTRATION_EXPORT_COLUMNS,
+        f"registrations-{tournament_id}"
+    )
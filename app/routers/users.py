@@ -1,36 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
-from ..models import UserUpdate, UserRole
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..models import User, UserUpdate, UserRole, ExportFormat, BulkRoleUpdate, BulkOperationResult
 from ..auth import get_current_active_user, get_current_admin_user
-from ..crud import update_user, get_user_by_id, get_all_users, update_user_role
+from ..crud import update_user, get_all_users, update_user_role, iter_users, bulk_update_user_roles
+from ..config import settings
+from ..export import export_response
+from ..pagination import next_cursor_headers, page_size
+from ..serialization import FIELDS_DESCRIPTION, construct, construct_one, json_response, parse_fields
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+USER_EXPORT_COLUMNS = [
+    "id", "name", "email", "role", "is_verified", "preferred_cube",
+    "google_id", "picture", "created_at", "updated_at"
+]
 
-@router.put("/profile", response_model=dict)
+
+@router.put("/profile", response_model=User)
 async def update_profile(
     user_update: UserUpdate,
     current_user: dict = Depends(get_current_active_user)
 ):
-    """Update user profile information"""
-    updated_user = await update_user(current_user["id"], user_update)
+    """Update user profile information and return the updated profile"""
+    try:
+        updated_user = await update_user(current_user["id"], user_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated_user:
-        raise HTTPException(status_code=400, detail="Failed to update profile")
+        raise HTTPException(status_code=404, detail="User not found")
     
-    return updated_user
+    return json_response(construct_one(User, updated_user))
 
 
-@router.get("/profile", response_model=dict)
-async def get_profile(current_user: dict = Depends(get_current_active_user)):
+@router.get("/profile", response_model=User)
+async def get_profile(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_user: dict = Depends(get_current_active_user)
+):
     """Get current user profile"""
-    return current_user
+    try:
+        selected = parse_fields(User, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Only User fields: the cached principal also carries the password hash
+    profile = {name: current_user[name] for name in selected or User.model_fields if name in current_user}
+    return json_response(construct_one(User, profile, selected))
 
 
 # Admin endpoints
-@router.get("/", response_model=list)
-async def get_all_users_admin(current_admin: dict = Depends(get_current_admin_user)):
-    """Get all users (admin only)"""
-    users = await get_all_users()
-    return users
+@router.get("/", response_model=List[User])
+async def get_all_users_admin(
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Get a page of users (admin only)"""
+    try:
+        selected = parse_fields(User, fields)
+        users, next_cursor = await get_all_users(page_size(limit), cursor, selected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(construct(User, users, selected), next_cursor_headers(next_cursor))
+
+
+@router.get("/export")
+async def export_users(
+    format: ExportFormat = ExportFormat.NDJSON,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Stream all users as NDJSON or CSV (admin only)"""
+    return export_response(iter_users(settings.EXPORT_BATCH_SIZE), format, USER_EXPORT_COLUMNS, "users")
 
 
 @router.put("/{user_id}/role", response_model=dict)
@@ -40,21 +80,26 @@ async def update_user_role_admin(
     current_admin: dict = Depends(get_current_admin_user)
 ):
     """Update user role (admin only)"""
-    # Verificar que el usuario existe
-    user = await get_user_by_id(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # No permitir cambiar el rol del propio admin
     if user_id == current_admin["id"]:
         raise HTTPException(status_code=400, detail="Cannot change your own role")
     
-    success = await update_user_role(user_id, role)
-    if not success:
-        raise HTTPException(status_code=400, detail="Failed to update user role")
+    user = await update_user_role(user_id, role)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     
     return {
         "message": "User role updated successfully",
         "user_id": user_id,
-        "new_role": role
-    } 
\ No newline at end of file
+        "new_role": role,
+        "user": construct_one(User, user)
+    }
+
+
+@router.put("/roles/bulk", response_model=BulkOperationResult)
+async def bulk_update_user_roles_admin(
+    changes: BulkRoleUpdate,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Update the role of many users at once, reporting the result of each (admin only)"""
+    return await bulk_update_user_roles(changes.items, current_admin["id"], changes.ordered)
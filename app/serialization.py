@@ -0,0 +1,116 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Type
+import orjson
+from bson import ObjectId
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+FIELDS_DESCRIPTION = "Comma-separated subset of fields to return, e.g. name,date"
+
+
+def with_id(document: Optional[dict]) -> Optional[dict]:
+    """Replace a document's ObjectId _id with its string id, in place"""
+    if document is not None:
+        document["id"] = str(document.pop("_id"))
+    return document
+
+
+def parse_fields(model: Type[BaseModel], fields: Optional[str], *required: str) -> Optional[Tuple[str, ...]]:
+    """
+    Validate a comma-separated fields= value against the model's fields.
+
+    Returns None (every field) when fields is empty. id and required are
+    always selected, e.g. user_id when the caller also asked for expand=user.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(requested | {"id", *required}))
+
+
+def fields_key(fields: Optional[Tuple[str, ...]]) -> str:
+    """Stable cache key component for a parse_fields result"""
+    return ",".join(fields) if fields else "*"
+
+
+def model_projection(
+    model: Type[BaseModel],
+    computed_id: bool = True,
+    fields: Optional[Tuple[str, ...]] = None
+) -> dict:
+    """
+    Projection emitting exactly the model's stored fields, or the selected
+    subset of them.
+
+    With computed_id the string id is computed by MongoDB ($project stages), so
+    rows come back ready to serialise; otherwise _id is kept for with_id (find
+    projections). Anything not selected, e.g. password hashes, never leaves
+    the database.
+    """
+    projection = {"_id": 0, "id": {"$toString": "$_id"}} if computed_id else {}
+    for name in fields or model.model_fields:
+        if name != "id":
+            projection[name] = 1
+    return projection
+
+
+@lru_cache(maxsize=None)
+def _defaults(model: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> dict:
+    return {
+        name: field.default
+        for name, field in model.model_fields.items()
+        if not field.is_required() and (fields is None or name in fields)
+    }
+
+
+def construct(
+    model: Type[BaseModel],
+    documents: Iterable[dict],
+    fields: Optional[Tuple[str, ...]] = None
+) -> List[dict]:
+    """
+    Trusted construction of response rows from database rows: no validation,
+    only the model's defaults are filled in (e.g. counters missing on older
+    documents), so rows must already have the model's shape (model_projection).
+
+    Plain dicts rather than model_construct(), which costs more per row than
+    validating; see benchmarks/bench_serialization.py.
+    """
+    defaults = _defaults(model, fields)
+    return [{**defaults, **document} for document in documents]
+
+
+def construct_one(model: Type[BaseModel], document: dict, fields: Optional[Tuple[str, ...]] = None) -> dict:
+    return {**_defaults(model, fields), **document}
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class JSONResponse(ORJSONResponse):
+    """orjson response that also accepts constructed models and ObjectIds"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(content, headers: Optional[dict] = None) -> Response:
+    """
+    Send content as-is. Returning a Response skips FastAPI's response_model
+    validation and jsonable_encoder pass, so only use it for rows shaped by
+    model_projection/construct.
+    """
+    return JSONResponse(content, headers=headers)
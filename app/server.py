@@ -0,0 +1,103 @@
+import os
+import tempfile
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+from .config import settings
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import httptools
+except ImportError:
+    httptools = None
+
+
+def available_cpus() -> int:
+    # Respect CPU affinity / container cpusets where the platform exposes them
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    if settings.SERVER_WORKERS:
+        return settings.SERVER_WORKERS
+    return max(1, min(available_cpus(), settings.SERVER_MAX_WORKERS))
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if uvloop is not None else "asyncio",
+        "http": "httptools" if httptools is not None else "h11",
+        # Leave time for the shutdown event before gunicorn kills the worker
+        "timeout_graceful_shutdown": max(1, settings.SERVER_GRACEFUL_TIMEOUT_SECONDS - 5),
+    }
+
+
+def post_fork(server, worker):
+    """Drop per-process state inherited from the preloaded master"""
+    from .cache import principal_cache, response_cache
+    from .database import db
+    from .hashing import password_hasher
+    from .tracing import tracer
+
+    db.client = None
+    principal_cache.clear()
+    response_cache.clear()
+    password_hasher.reset()
+    tracer.reset()
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from .main import app
+        return app
+
+
+def options() -> dict:
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": worker_count(),
+        "worker_class": "app.server.Worker",
+        "preload_app": True,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "timeout": 60,
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        # Render terminates TLS in front of the app
+        "forwarded_allow_ips": "*",
+        "accesslog": "-",
+        "post_fork": post_fork,
+    }
+
+
+def main():
+    if settings.BCRYPT_TARGET_MS:
+        # Once, before forking: workers calibrating side by side (and during
+        # their warm-up) would measure each other and settle on different costs
+        from .hashing import password_hasher
+        rounds = password_hasher.calibrate(settings.BCRYPT_TARGET_MS)
+        print(f"✅ bcrypt cost calibrated to {rounds} rounds")
+    if not settings.METRICS_MULTIPROC_DIR:
+        # Before the app is loaded, so every worker shares this one
+        settings.METRICS_MULTIPROC_DIR = tempfile.mkdtemp(prefix="fndc-metrics-")
+    config = options()
+    print(
+        f"🚀 Starting {config['workers']} workers on {config['bind']} "
+        f"(loop={Worker.CONFIG_KWARGS['loop']}, http={Worker.CONFIG_KWARGS['http']})"
+    )
+    Server(config).run()
+
+
+if __name__ == "__main__":
+    main()
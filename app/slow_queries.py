@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import random
+import threading
+from collections import deque
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import monitoring
+from .config import settings
+
+# Motor runs pymongo on executor threads with a copy of the caller's context,
+# so the command listener sees both of these
+current_operation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_operation", default=None)
+# The ASGI scope; Starlette adds the matched route to it after this is set
+current_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("current_scope", default=None)
+
+# Commands explain() accepts, mapped to the fields describing the query shape
+EXPLAINABLE = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+# Added by the driver, rejected inside an explain command
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "readConcern", "writeConcern"}
+MAX_PENDING_EXPLAINS = 2
+
+
+def operation(fn):
+    """Mark a crud function so the queries it runs are attributed to it"""
+    name = fn.__name__
+
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def generator_wrapper(*args, **kwargs):
+            token = current_operation.set(name)
+            try:
+                async for item in fn(*args, **kwargs):
+                    yield item
+            finally:
+                current_operation.reset(token)
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(name)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+    return wrapper
+
+
+class QueryContextMiddleware:
+    """Pure ASGI middleware exposing the request scope to the command listener"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
+
+def _current_route() -> Optional[str]:
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', None) or scope['path']}"
+
+
+def _shape(value: Any) -> Any:
+    """Replace literal values with "?" so logged queries don't carry user data"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shape(item) for item in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def _query_shape(command_name: str, command: dict) -> dict:
+    shape = {}
+    for field in EXPLAINABLE.get(command_name, ()):
+        if field in command:
+            # Sort and projection documents only hold directions / flags
+            shape[field] = command[field] if field in ("sort", "projection", "key") else _shape(command[field])
+    return shape
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    """Stage names from the root of a winning plan down its first branch"""
+    stages = []
+    while plan:
+        plan = plan.get("queryPlan", plan)
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        children = plan.get("inputStages") or [plan.get("inputStage")]
+        plan = children[0] if children else None
+    return stages
+
+
+def summarize_explain(result: dict) -> dict:
+    """Reduce explain("executionStats") output to the numbers worth looking at"""
+    # Aggregations report the $cursor stage's plan under "stages"
+    if "stages" in result and "queryPlanner" not in result:
+        result = result["stages"][0].get("$cursor", {})
+    stats = result.get("executionStats", {})
+    stages = _plan_stages(result.get("queryPlanner", {}).get("winningPlan", {}))
+    docs_examined = stats.get("totalDocsExamined")
+    returned = stats.get("nReturned")
+    return {
+        "plan": " > ".join(stages),
+        "collscan": "COLLSCAN" in stages,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": docs_examined,
+        "returned": returned,
+        "examined_per_returned": round(docs_examined / returned, 1) if docs_examined is not None and returned else None,
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryLog:
+    """Ring buffer of the most recent slow operations"""
+
+    def __init__(self, max_entries: int, threshold_ms: float, explain_sample_rate: float):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self._entries: deque = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.pending_explains = 0
+
+    def record(self, entry: dict):
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Newest first"""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def reserve_explain(self) -> bool:
+        """Sample an entry for explain, keeping at most MAX_PENDING_EXPLAINS running"""
+        if random.random() >= self.explain_sample_rate:
+            return False
+        with self._lock:
+            if self.pending_explains >= MAX_PENDING_EXPLAINS:
+                return False
+            self.pending_explains += 1
+            return True
+
+    def release_explain(self):
+        with self._lock:
+            self.pending_explains -= 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "capacity": self._entries.maxlen,
+            "size": len(self._entries),
+            "recorded": self.recorded,
+        }
+
+
+slow_query_log = SlowQueryLog(
+    max_entries=settings.SLOW_QUERY_LOG_SIZE,
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+)
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Created in connect_to_mongo, so it keeps the event loop explains run on.
+    started/succeeded are called from Motor's executor threads.
+    """
+
+    def __init__(self, client_getter, log: SlowQueryLog = slow_query_log):
+        self._client = client_getter
+        self.log = log
+        self.loop = asyncio.get_running_loop()
+        self._started: Dict[Tuple, Tuple] = {}
+        self._tasks: set = set()
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        self._started[(event.connection_id, event.request_id)] = (
+            event.command, event.database_name, current_operation.get(), _current_route()
+        )
+
+    def succeeded(self, event):
+        self._finished(event, None)
+
+    def failed(self, event):
+        self._finished(event, str(event.failure.get("errmsg", "failed")))
+
+    def _finished(self, event, error: Optional[str]):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < self.log.threshold_ms:
+            return
+
+        command, database, operation_name, route = started
+        collection = command.get(event.command_name)
+        entry = {
+            "at": datetime.now(UTC).isoformat(),
+            "command": event.command_name,
+            "collection": collection if isinstance(collection, str) else None,
+            "duration_ms": round(duration_ms, 1),
+            "operation": operation_name,
+            "route": route,
+            "query": _query_shape(event.command_name, command),
+            "error": error,
+            "explain": None,
+        }
+        self.log.record(entry)
+
+        if error is None and event.command_name in EXPLAINABLE and self.log.reserve_explain():
+            explain = {key: value for key, value in command.items() if key not in DRIVER_FIELDS}
+            # explain() takes a single update/delete statement
+            for field in ("updates", "deletes"):
+                if field in explain:
+                    explain[field] = explain[field][:1]
+            self.loop.call_soon_threadsafe(self._schedule_explain, entry, database, explain)
+
+    def _schedule_explain(self, entry: dict, database: str, command: dict):
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = self.loop.create_task(self._explain(entry, database, command))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, entry: dict, database: str, command: dict):
+        try:
+            client = self._client()
+            if client is None:
+                return
+            # Explaining writes only plans them, nothing is modified
+            result = await client[database].command({"explain": command, "verbosity": "executionStats"})
+            entry["explain"] = summarize_explain(result)
+        except Exception as e:
+            entry["explain"] = {"error": str(e)}
+        finally:
+            self.log.release_explain()
@@ -0,0 +1,375 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+from pymongo import monitoring
+from .config import settings
+from .serialization import dumps
+from .slow_queries import operation
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return (trace_id, parent span_id, sampled) from a traceparent header"""
+    match = _TRACEPARENT.match(header.strip().lower()) if header else None
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: str = "internal",
+                 attributes: Optional[dict] = None, start_ns: Optional[int] = None):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1_000_000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    """Makes a span current for the duration of a with block"""
+
+    __slots__ = ("tracer", "span", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        current_span.reset(self._token)
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.end(self.span)
+        return False
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SCOPE = _NoopScope()
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: List[Span]):
+        """Write a batch of finished spans; called from a worker thread"""
+
+
+class JsonlFileExporter(SpanExporter):
+    """One span per line; each batch is a single append so workers can share the file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        data = b"".join(dumps(span.to_dict()) + b"\n" for span in spans)
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter(SpanExporter):
+    """POSTs OTLP/JSON to a collector (e.g. http://localhost:4318/v1/traces)"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.resource = {"attributes": [
+            {"key": "service.name", "value": {"stringValue": service_name}},
+            {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+        ]}
+
+    def _span(self, span: Span) -> dict:
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": SPAN_KINDS[span.kind],
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            # 1 = OK, 2 = ERROR
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+    def export(self, spans: List[Span]):
+        body = dumps({"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": [self._span(span) for span in spans]}],
+        }]})
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def create_exporter(name: str) -> Optional[SpanExporter]:
+    if name == "none":
+        return None
+    if name == "file":
+        return JsonlFileExporter(settings.TRACE_FILE_PATH)
+    if name == "otlp":
+        return OtlpHttpExporter(settings.TRACE_OTLP_ENDPOINT, settings.TRACE_SERVICE_NAME)
+    raise ValueError(f"Unknown trace exporter: {name}")
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter], sample_rate: float, export_interval: float, max_queue_size: int):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.export_interval = export_interval
+        self.max_queue_size = max_queue_size
+        self.dropped = 0
+        self._buffer: List[Span] = []
+        # end() is also called from Motor's executor threads (MongoDB spans)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, kind: str = "server", **attributes):
+        """Root span of a request or background job, honouring an incoming sampling decision"""
+        if not self.enabled:
+            return NOOP_SCOPE
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = _new_id(128), None, random.random() < self.sample_rate
+        if not sampled:
+            return NOOP_SCOPE
+        return _SpanScope(self, Span(name, trace_id, parent_id, kind, attributes))
+
+    def span(self, name: str, **attributes):
+        """Child of the current span; a no-op outside a sampled trace"""
+        parent = current_span.get()
+        if parent is None:
+            return NOOP_SCOPE
+        return _SpanScope(self, Span(name, parent.trace_id, parent.span_id, "internal", attributes))
+
+    def end(self, span: Span, end_ns: Optional[int] = None):
+        span.end_ns = end_ns or time.time_ns()
+        with self._lock:
+            if len(self._buffer) >= self.max_queue_size:
+                self.dropped += 1
+                return
+            self._buffer.append(span)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.export_interval)
+            await self.flush()
+
+    async def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self.exporter.export, batch)
+        except Exception:
+            self.dropped += len(batch)
+            logger.warning("Failed to export %d spans", len(batch), exc_info=True)
+
+    def reset(self):
+        """Forget spans and the flush task inherited from a parent process"""
+        self._buffer = []
+        self._task = None
+
+
+tracer = Tracer(
+    exporter=create_exporter(settings.TRACE_EXPORTER),
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    export_interval=settings.TRACE_EXPORT_INTERVAL_SECONDS,
+    max_queue_size=settings.TRACE_MAX_QUEUE_SIZE,
+)
+
+
+def traced(name: str):
+    """Run an async function (e.g. a FastAPI dependency) inside a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_operation(fn):
+    """A crud function: queries attributed to it by the slow-query log, and a crud.<name> span"""
+    fn = operation(fn)
+    # Streaming exports yield from inside a request; their queries show up under its span
+    if inspect.isasyncgenfunction(fn):
+        return fn
+    return traced(f"crud.{fn.__name__}")(fn)
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the request's root span"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with tracer.start_trace(scope["method"], traceparent, "server", **{"http.method": scope["method"]}) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    # Lets clients find the trace of a slow response
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (TRACEPARENT_HEADER.encode(), span.traceparent.encode())
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                span.name = f"{scope['method']} {route or 'unmatched'}"
+                span.set_attribute("http.route", route or scope["path"])
+
+
+class TracingCommandListener(monitoring.CommandListener):
+    """
+    One client span per MongoDB command, parented to the span that issued it.
+    Motor runs pymongo with a copy of the caller's context, so current_span
+    is readable here even though the listener runs on an executor thread.
+    """
+
+    def __init__(self):
+        self._started = {}
+
+    def started(self, event):
+        parent = current_span.get()
+        if parent is None:
+            return
+        collection = event.command.get(event.command_name)
+        self._started[(event.connection_id, event.request_id)] = Span(
+            f"mongodb.{event.command_name}", parent.trace_id, parent.span_id, "client", {
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": collection if isinstance(collection, str) else "",
+            }
+        )
+
+    def _finish(self, event, error: Optional[str] = None):
+        span = self._started.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.error = error
+            tracer.end(span, span.start_ns + event.duration_micros * 1000)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, str(event.failure.get("errmsg", "failed")))
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from .config import settings
+from .database import db, get_db
+from .google_auth import google_auth_service
+from .hashing import password_hasher
+from .indexes import ensure_indexes
+
+
+class Readiness:
+    """
+    Warm-up progress reported by /ready.
+
+    /health only says the process is alive; /ready says it can serve traffic
+    without the first requests paying for connection setup and lazy loading.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.steps: dict = {}
+
+    def start(self):
+        self.ready = False
+        self.started_at = time.monotonic()
+        self.completed_at = None
+        self.steps = {}
+
+    def record(self, name: str, elapsed_ms: float, error: Optional[Exception] = None, required: bool = False):
+        self.steps[name] = {
+            "ok": error is None,
+            "required": required,
+            "ms": round(elapsed_ms, 1),
+            "error": str(error) if error is not None else None,
+        }
+
+    def complete(self):
+        self.completed_at = time.monotonic()
+        self.ready = not self.failed_steps
+
+    @property
+    def failed_steps(self) -> list:
+        """Required steps that failed: the process stays out of rotation"""
+        return [name for name, step in self.steps.items() if step["required"] and not step["ok"]]
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.completed_at or time.monotonic()) - self.started_at
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ready" if self.ready else ("failed" if self.completed_at else "starting"),
+            "warmup_seconds": round(self.elapsed_seconds, 3),
+            "budget_seconds": self.budget_seconds,
+            "within_budget": self.elapsed_seconds <= self.budget_seconds,
+            "steps": self.steps,
+        }
+
+
+readiness = Readiness(settings.STARTUP_BUDGET_SECONDS)
+
+
+async def _step(name: str, fn: Callable[[], Awaitable], required: bool = False) -> bool:
+    start = time.perf_counter()
+    try:
+        await fn()
+    except Exception as e:
+        readiness.record(name, (time.perf_counter() - start) * 1000, e, required)
+        print(f"❌ Warm-up step {name} failed: {e}")
+        return False
+    readiness.record(name, (time.perf_counter() - start) * 1000, required=required)
+    return True
+
+
+async def _ping():
+    await db.client.admin.command("ping")
+
+
+async def _open_pool():
+    # Concurrent pings check out that many connections at once, so the pool
+    # opens them now; minPoolSize keeps them open afterwards
+    await asyncio.gather(*(db.client.admin.command("ping") for _ in range(settings.MONGO_MIN_POOL_SIZE)))
+
+
+async def _indexes():
+    await ensure_indexes(await get_db())
+
+
+async def _password_hasher():
+    await password_hasher.warm_up()
+    # Under app.server the master already calibrated before forking
+    if settings.BCRYPT_TARGET_MS and not password_hasher.calibrated:
+        rounds = await asyncio.to_thread(password_hasher.calibrate, settings.BCRYPT_TARGET_MS)
+        print(f"✅ bcrypt cost calibrated to {rounds} rounds")
+
+
+async def warm_up(max_retry_delay: float = 30):
+    """
+    Get the process ready for traffic, then mark it ready.
+
+    MongoDB must answer a ping first; it is retried with backoff, so a process
+    started during an outage becomes ready once the database is back. The
+    remaining steps run concurrently and are best-effort: a failure is logged
+    and shown in /ready, but doesn't keep the process out of rotation. The
+    indexes are the exception: without the unique ones nothing stops duplicate
+    users or registrations, so /ready stays 503 when they fail.
+    """
+    readiness.start()
+    delay = 1.0
+    while not await _step("mongo_ping", _ping):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_retry_delay)
+
+    await asyncio.gather(
+        _step("mongo_pool", _open_pool),
+        _step("indexes", _indexes, required=True),
+        _step("google_certs", google_auth_service.cert_cache.get_certs),
+        _step("password_hasher", _password_hasher),
+    )
+    readiness.complete()
+
+    if readiness.failed_steps:
+        print(f"❌ Warm-up failed: {', '.join(readiness.failed_steps)}; /ready stays 503")
+    elif readiness.elapsed_seconds > readiness.budget_seconds:
+        print(f"⚠️ Warm-up took {readiness.elapsed_seconds:.1f}s, over the {readiness.budget_seconds:.0f}s budget")
+    else:
+        print(f"✅ Warm-up completed in {readiness.elapsed_seconds:.2f}s")
@@ -0,0 +1,136 @@
+"""
+Compare the ways a list of documents can be turned into a JSON response body.
+
+- legacy: rename _id to id in a Python loop, validate against the
+  response_model and encode with the standard json module (FastAPI's path
+  for a returned list of dicts)
+- validated: validate with a TypeAdapter and dump with pydantic-core (what
+  the cached public routes did before app/serialization.py)
+- constructed: model_construct() per row, then orjson
+- trusted: rows already shaped by model_projection, defaults filled in by
+  construct() and orjson (app/serialization.py)
+
+No database is needed; rows are generated in memory:
+
+    python benchmarks/bench_serialization.py --rows 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, UTC
+from typing import List
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import CubeStatus, CubeProposal, Tournament
+from app.serialization import construct, dumps
+
+
+def tournament_rows(count: int) -> List[dict]:
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Benchmark Cup {i}",
+            "date": now + timedelta(days=i),
+            "location": "Bench",
+            "start_time": "10:00",
+            "duration_days": 1 + i % 3,
+            "rounds": 5,
+            "created_by": "bench",
+            "created_at": now,
+            "updated_at": now,
+            "registration_count": i % 64,
+            "proposal_count": i % 12,
+            "enabled_cube_count": i % 4
+        }
+        for i in range(count)
+    ]
+
+
+def cube_rows(count: int) -> List[dict]:
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return [
+        {
+            "_id": ObjectId(),
+            "tournament_id": "bench",
+            "user_id": f"user-{i}",
+            "cube_url": f"https://cubecobra.com/cube/list/bench-{i}",
+            "description": "Benchmark cube",
+            "status": CubeStatus.HABILITADO,
+            "created_at": now,
+            "updated_at": now
+        }
+        for i in range(count)
+    ]
+
+
+def projected(rows: List[dict]) -> List[dict]:
+    """What MongoDB returns for model_projection: id as a string, no _id"""
+    return [{"id": str(row["_id"]), **{k: v for k, v in row.items() if k != "_id"}} for row in rows]
+
+
+def legacy(adapter: TypeAdapter, rows: List[dict]) -> bytes:
+    for row in rows:
+        row["id"] = str(row["_id"])
+        del row["_id"]
+    return json.dumps(adapter.dump_python(adapter.validate_python(rows), mode="json")).encode()
+
+
+def validated(adapter: TypeAdapter, rows: List[dict]) -> bytes:
+    return adapter.dump_json(adapter.validate_python(rows))
+
+
+def constructed(model, rows: List[dict]) -> bytes:
+    return dumps([model.model_construct(**row) for row in rows])
+
+
+def trusted(model, rows: List[dict]) -> bytes:
+    return dumps(construct(model, rows))
+
+
+def measure(name: str, fn, make_input, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        # Inputs are rebuilt outside the timed section since legacy mutates them
+        data = make_input()
+        start = time.perf_counter()
+        fn(data)
+        timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    print(f"  {name:<12} p50 {median:8.2f} ms   min {min(timings):8.2f} ms")
+    return median
+
+
+def run(label: str, model, rows: List[dict], iterations: int):
+    adapter = TypeAdapter(List[model])
+    shaped = projected(rows)
+    # The fast path must produce the same JSON as validation
+    assert json.loads(trusted(model, shaped)) == json.loads(validated(adapter, shaped))
+
+    print(f"📊 {label}: {len(rows)} rows, {iterations} iterations")
+    baseline = measure("legacy", lambda data: legacy(adapter, data), lambda: [dict(row) for row in rows], iterations)
+    measure("validated", lambda data: validated(adapter, data), lambda: shaped, iterations)
+    measure("constructed", lambda data: constructed(model, data), lambda: shaped, iterations)
+    fast = measure("trusted", lambda data: trusted(model, data), lambda: shaped, iterations)
+    print(f"✅ trusted is {baseline / fast:.1f}x faster than legacy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    run("tournaments", Tournament, tournament_rows(args.rows), args.iterations)
+    run("cube proposals", CubeProposal, cube_rows(args.rows), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Compare the tournament page fan-out against the single-aggregation overview.
+
+The fan-out replays what the front end does today: GET /tournaments/{id},
+/registrations, /my-registration and /cubes/tournament/{id}/enabled, each of
+which looks the tournament up again. The overview is get_tournament_overview.
+
+Runs against MONGO_URI using a throwaway database (default fndc_bench):
+
+    python benchmarks/bench_tournament_overview.py --registrations 200 --cubes 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, UTC
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection, get_db
+from app.indexes import ensure_indexes
+from app.models import CubeStatus
+from app import crud
+
+
+async def seed(registrations: int, cubes: int) -> tuple:
+    db = await get_db()
+    now = datetime.now(UTC)
+    result = await db.tournaments.insert_one({
+        "name": "Benchmark Cup",
+        "date": now,
+        "location": "Bench",
+        "start_time": "10:00",
+        "duration_days": 1,
+        "rounds": 5,
+        "created_by": "bench",
+        "created_at": now,
+        "updated_at": now
+    })
+    tournament_id = str(result.inserted_id)
+    await db.tournament_registrations.insert_many([
+        {"tournament_id": tournament_id, "user_id": f"user-{i}", "registered_at": now}
+        for i in range(registrations)
+    ])
+    await db.cube_proposals.insert_many([
+        {
+            "tournament_id": tournament_id,
+            "user_id": f"user-{i}",
+            "cube_url": f"https://cubecobra.com/cube/list/bench-{i}",
+            "description": "Benchmark cube",
+            "status": CubeStatus.HABILITADO if i % 2 == 0 else CubeStatus.PROPUESTO,
+            "created_at": now,
+            "updated_at": now
+        }
+        for i in range(cubes)
+    ])
+    return tournament_id, "user-0"
+
+
+async def fan_out_sequential(tournament_id: str, user_id: str):
+    await crud.get_tournament_by_id(tournament_id)
+    await crud.get_tournament_by_id(tournament_id)
+    await crud.get_tournament_registrations(tournament_id, settings.PAGE_SIZE_MAX)
+    await crud.get_tournament_by_id(tournament_id)
+    await crud.check_user_registration(tournament_id, user_id)
+    await crud.get_tournament_by_id(tournament_id)
+    await crud.get_enabled_cubes_by_tournament(tournament_id)
+
+
+async def fan_out_parallel(tournament_id: str, user_id: str):
+    async def registrations():
+        await crud.get_tournament_by_id(tournament_id)
+        await crud.get_tournament_registrations(tournament_id, settings.PAGE_SIZE_MAX)
+
+    async def my_registration():
+        await crud.get_tournament_by_id(tournament_id)
+        await crud.check_user_registration(tournament_id, user_id)
+
+    async def enabled_cubes():
+        await crud.get_tournament_by_id(tournament_id)
+        await crud.get_enabled_cubes_by_tournament(tournament_id)
+
+    await asyncio.gather(
+        crud.get_tournament_by_id(tournament_id),
+        registrations(),
+        my_registration(),
+        enabled_cubes()
+    )
+
+
+async def overview(tournament_id: str, user_id: str):
+    await crud.get_tournament_overview(tournament_id, user_id)
+
+
+async def measure(name: str, fn, iterations: int, *args) -> list:
+    for _ in range(min(20, iterations)):
+        await fn(*args)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<22} p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms")
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="fndc_bench")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--registrations", type=int, default=200)
+    parser.add_argument("--cubes", type=int, default=20)
+    args = parser.parse_args()
+
+    settings.MONGO_DB_NAME = args.database
+    await connect_to_mongo()
+    db = await get_db()
+    try:
+        await db.client.drop_database(args.database)
+        await ensure_indexes(db)
+        tournament_id, user_id = await seed(args.registrations, args.cubes)
+
+        print(f"📊 {args.registrations} registrations, {args.cubes} cubes, {args.iterations} iterations")
+        sequential = await measure("fan-out (sequential)", fan_out_sequential, args.iterations, tournament_id, user_id)
+        parallel = await measure("fan-out (parallel)", fan_out_parallel, args.iterations, tournament_id, user_id)
+        aggregated = await measure("overview aggregation", overview, args.iterations, tournament_id, user_id)
+
+        best_fan_out = min(statistics.median(sequential), statistics.median(parallel))
+        print(f"✅ Overview p50 is {best_fan_out / statistics.median(aggregated):.1f}x faster than the best fan-out")
+    finally:
+        await db.client.drop_database(args.database)
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
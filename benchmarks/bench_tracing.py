@@ -0,0 +1,110 @@
+"""
+Measure the overhead of request tracing on a typical read path.
+
+Each iteration runs what an authenticated tournament page costs on the
+server (JWT decode, principal lookup, tournament overview aggregation)
+inside a root span, with tracing:
+
+- off: TRACE_EXPORTER=none, the middleware is bypassed
+- unsampled: tracing on, but the request lost the head-sampling draw
+- sampled: every span recorded and written to a JSONL file
+
+Runs against MONGO_URI using a throwaway database (default fndc_bench):
+
+    python benchmarks/bench_tracing.py --iterations 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, UTC
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth import create_access_token, get_current_user
+from app.cache import principal_cache
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection, get_db
+from app.tracing import JsonlFileExporter, tracer
+from app import crud
+
+
+async def seed() -> tuple:
+    db = await get_db()
+    now = datetime.now(UTC)
+    user = await db.users.insert_one({
+        "email": "bench@example.com", "name": "Bench", "role": "user", "is_verified": True,
+        "created_at": now, "updated_at": now
+    })
+    tournament = await db.tournaments.insert_one({
+        "name": "Benchmark Cup", "date": now, "location": "Bench", "start_time": "10:00",
+        "duration_days": 1, "rounds": 5, "created_by": "bench", "created_at": now,
+        "registration_count": 0, "enabled_cube_count": 0
+    })
+    return str(user.inserted_id), str(tournament.inserted_id)
+
+
+async def request(token: str, tournament_id: str):
+    with tracer.start_trace("GET /tournaments/{tournament_id}/overview"):
+        user = await get_current_user(token)
+        await crud.get_tournament_overview(tournament_id, user["id"])
+
+
+async def measure(name: str, token: str, tournament_id: str, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        # Every request looks the principal up, as on a cold cache
+        principal_cache.clear()
+        start = time.perf_counter()
+        await request(token, tournament_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    await tracer.flush()
+    median = statistics.median(timings)
+    print(f"  {name:<10} p50 {median:7.3f} ms   p95 {statistics.quantiles(timings, n=20)[18]:7.3f} ms")
+    return median
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="fndc_bench")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    settings.MONGO_DB_NAME = args.database
+    await connect_to_mongo()
+    db = await get_db()
+    trace_file = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False).name
+    try:
+        await db.client.drop_database(args.database)
+        _, tournament_id = await seed()
+        token = create_access_token({"sub": "bench@example.com"})
+        # Warm the connection pool and code paths
+        for _ in range(20):
+            await request(token, tournament_id)
+
+        print(f"📊 Tracing overhead, {args.iterations} requests each")
+        tracer.exporter = None
+        baseline = await measure("off", token, tournament_id, args.iterations)
+        tracer.exporter, tracer.sample_rate = JsonlFileExporter(trace_file), 0.0
+        unsampled = await measure("unsampled", token, tournament_id, args.iterations)
+        tracer.sample_rate = 1.0
+        sampled = await measure("sampled", token, tournament_id, args.iterations)
+        with open(trace_file) as f:
+            spans = sum(1 for _ in f)
+
+        print(f"✅ {spans / args.iterations:.0f} spans per sampled request")
+        print(f"   unsampled overhead {100 * (unsampled - baseline) / baseline:+.1f}%")
+        print(f"   sampled overhead   {100 * (sampled - baseline) / baseline:+.1f}%")
+        print(f"   at TRACE_SAMPLE_RATE={settings.TRACE_SAMPLE_RATE}: "
+              f"{100 * (sampled - baseline) * settings.TRACE_SAMPLE_RATE / baseline:+.2f}% on average")
+    finally:
+        os.unlink(trace_file)
+        await db.client.drop_database(args.database)
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,336 @@
+"""
+Load test of the API in-process: httpx drives the ASGI app directly, with
+the app's startup/shutdown events and warm-up, against MONGO_URI using a
+throwaway database (default fndc_load) seeded with a fixed random seed.
+
+Scenarios (each a "journey" of requests, run by --concurrency clients):
+
+- public: anonymous browsing of the tournament list, a tournament page and
+  its enabled cubes
+- login: a storm of password logins (bcrypt bound)
+- registration: sign-up opening, an admin creates a tournament and every
+  player registers to it at once, then checks their registration
+- admin: curation, proposals with expand=user, status changes and the
+  registration list
+
+Throughput and p50/p95/p99 are reported per route template. Results are
+compared with the baselines file; a route whose p95 grows (or throughput
+drops) by more than --tolerance fails the run:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/load_test.py --update-baseline   # record baselines
+    python benchmarks/load_test.py                     # compare against them
+    python benchmarks/load_test.py --scenarios public admin --scale 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, UTC
+from typing import Dict, List
+
+from bson import ObjectId
+from httpx import ASGITransport, AsyncClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth import create_access_token
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection, get_db
+from app.hashing import password_hasher
+from app.models import CubeStatus, UserRole
+
+PASSWORD = "load-test-password"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class Recorder:
+    """Latencies and statuses per route template for one scenario"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.unexpected: Counter = Counter()
+        self.examples: Dict[str, str] = {}
+
+    async def request(self, client: AsyncClient, method: str, route: str, url: str, expected=(200,), **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[f"{method} {route}"].append((time.perf_counter() - start) * 1000)
+        if response.status_code not in expected:
+            self.unexpected[f"{method} {route}"] += 1
+            self.examples.setdefault(f"{method} {route}", f"{response.status_code} {response.text[:200]}")
+        return response
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        results = {}
+        for route, timings in sorted(self.latencies.items()):
+            timings.sort()
+            results[route] = {
+                "count": len(timings),
+                "rps": round(len(timings) / elapsed, 1),
+                "p50": round(percentile(timings, 50), 2),
+                "p95": round(percentile(timings, 95), 2),
+                "p99": round(percentile(timings, 99), 2),
+                "unexpected": self.unexpected[route],
+            }
+        return results
+
+
+class Fixture:
+    """Seeded data and ready-made auth headers shared by the scenarios"""
+
+    def __init__(self, admin: dict, players: List[dict], tournament_ids: List[str], proposal_ids: List[str]):
+        self.admin_headers = {"Authorization": f"Bearer {create_access_token({'sub': admin['email']})}"}
+        self.players = players
+        self.player_headers = [
+            {"Authorization": f"Bearer {create_access_token({'sub': player['email']})}"} for player in players
+        ]
+        self.tournament_ids = tournament_ids
+        self.proposal_ids = proposal_ids
+        # registration scenario: tournaments opened so far
+        self.opened: List[str] = []
+        self.open_lock = asyncio.Lock()
+
+
+async def seed(players: int, tournaments: int, proposals: int, rng: random.Random) -> Fixture:
+    db = await get_db()
+    now = datetime.now(UTC)
+    # One bcrypt hash shared by every account
+    hashed_password = await password_hasher.hash(PASSWORD)
+
+    def user(email: str, role: str) -> dict:
+        return {
+            "email": email, "name": email.split("@")[0], "hashed_password": hashed_password,
+            "role": role, "is_verified": True, "created_at": now, "updated_at": now
+        }
+
+    admin = user("admin@load.test", UserRole.ADMIN)
+    users = [user(f"player{i}@load.test", UserRole.USER) for i in range(players)]
+    await db.users.insert_many([admin] + users)
+
+    tournament_docs = [
+        {
+            "_id": ObjectId(), "name": f"Load Cup {i}", "date": now + timedelta(days=i), "location": "Load Hall",
+            "start_time": "10:00", "duration_days": 1, "rounds": 5, "created_by": str(admin["_id"]),
+            "created_at": now, "updated_at": now,
+            "registration_count": 0, "proposal_count": 0, "enabled_cube_count": 0
+        }
+        for i in range(tournaments)
+    ]
+    proposal_docs = []
+    for tournament in tournament_docs:
+        for i in range(proposals):
+            status = CubeStatus.HABILITADO if i % 2 else CubeStatus.PROPUESTO
+            proposal_docs.append({
+                "tournament_id": str(tournament["_id"]), "user_id": str(rng.choice(users)["_id"]),
+                "cube_url": f"https://cubecobra.com/cube/overview/load{i}", "description": f"Cube {i}",
+                "status": status, "created_at": now, "updated_at": now
+            })
+            # Counters match the proposals, as app.counters would compute them
+            tournament["proposal_count"] += 1
+            if status == CubeStatus.HABILITADO:
+                tournament["enabled_cube_count"] += 1
+    await db.tournaments.insert_many(tournament_docs)
+    if proposal_docs:
+        await db.cube_proposals.insert_many(proposal_docs)
+
+    return Fixture(
+        admin, users,
+        [str(tournament["_id"]) for tournament in tournament_docs],
+        [str(proposal["_id"]) for proposal in proposal_docs]
+    )
+
+
+async def public_browsing(client: AsyncClient, rec: Recorder, fx: Fixture, rng: random.Random, journey: int):
+    tournament_id = rng.choice(fx.tournament_ids)
+    await rec.request(client, "GET", "/tournaments/", "/tournaments/?limit=20")
+    await rec.request(client, "GET", "/tournaments/{tournament_id}", f"/tournaments/{tournament_id}")
+    await rec.request(client, "GET", "/tournaments/{tournament_id}/overview", f"/tournaments/{tournament_id}/overview")
+    await rec.request(
+        client, "GET", "/cubes/tournament/{tournament_id}/enabled", f"/cubes/tournament/{tournament_id}/enabled"
+    )
+
+
+async def login_storm(client: AsyncClient, rec: Recorder, fx: Fixture, rng: random.Random, journey: int):
+    player = rng.choice(fx.players)
+    await rec.request(
+        client, "POST", "/auth/login", "/auth/login", data={"username": player["email"], "password": PASSWORD}
+    )
+
+
+async def registration_burst(client: AsyncClient, rec: Recorder, fx: Fixture, rng: random.Random, journey: int):
+    # Journeys walk the players in order; every len(players) journeys a new tournament opens
+    round_number, index = divmod(journey, len(fx.players))
+    async with fx.open_lock:
+        while len(fx.opened) <= round_number:
+            response = await rec.request(
+                client, "POST", "/tournaments/", "/tournaments/", headers=fx.admin_headers, json={
+                    "name": f"Opening {len(fx.opened)}", "date": datetime.now(UTC).isoformat(),
+                    "location": "Load Hall", "start_time": "10:00", "duration_days": 1, "rounds": 5
+                }
+            )
+            fx.opened.append(response.json()["id"])
+    tournament_id = fx.opened[round_number]
+    headers = fx.player_headers[index]
+    await rec.request(
+        client, "POST", "/tournaments/{tournament_id}/register", f"/tournaments/{tournament_id}/register", headers=headers
+    )
+    await rec.request(
+        client, "GET", "/tournaments/{tournament_id}/my-registration",
+        f"/tournaments/{tournament_id}/my-registration", headers=headers
+    )
+
+
+async def admin_curation(client: AsyncClient, rec: Recorder, fx: Fixture, rng: random.Random, journey: int):
+    tournament_id = rng.choice(fx.tournament_ids)
+    await rec.request(
+        client, "GET", "/cubes/tournament/{tournament_id}/all",
+        f"/cubes/tournament/{tournament_id}/all?expand=user", headers=fx.admin_headers
+    )
+    if fx.proposal_ids:
+        status = rng.choice(list(CubeStatus)).value
+        await rec.request(
+            client, "PUT", "/cubes/{proposal_id}/status",
+            f"/cubes/{rng.choice(fx.proposal_ids)}/status?status={status}", headers=fx.admin_headers
+        )
+    await rec.request(
+        client, "GET", "/tournaments/{tournament_id}/registrations",
+        f"/tournaments/{tournament_id}/registrations?limit=50&expand=user", headers=fx.admin_headers
+    )
+
+
+# name -> (journey, journeys at --scale 1)
+SCENARIOS = {
+    "public": (public_browsing, 2000),
+    "login": (login_storm, 200),
+    "registration": (registration_burst, 1000),
+    "admin": (admin_curation, 300),
+}
+
+
+async def run_scenario(client: AsyncClient, name: str, fx: Fixture, journeys: int, concurrency: int, seed_value: int) -> dict:
+    journey_fn, _ = SCENARIOS[name]
+    rec = Recorder()
+    counter = iter(range(journeys))
+
+    async def worker(worker_id: int):
+        # One generator per client keeps runs reproducible whatever the interleaving
+        rng = random.Random(f"{seed_value}-{name}-{worker_id}")
+        for journey in counter:
+            await journey_fn(client, rec, fx, rng, journey)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    results = rec.report(elapsed)
+    print(f"\n📊 {name}: {journeys} journeys, {concurrency} clients, {elapsed:.1f}s")
+    print(f"  {'route':<52} {'count':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, stats in results.items():
+        flag = f"  ❌ {stats['unexpected']} unexpected" if stats["unexpected"] else ""
+        print(
+            f"  {route:<52} {stats['count']:>6} {stats['rps']:>8} "
+            f"{stats['p50']:>7}ms {stats['p95']:>7}ms {stats['p99']:>7}ms{flag}"
+        )
+    for route, example in rec.examples.items():
+        print(f"  ↳ {route}: {example}")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, noise_ms: float) -> List[str]:
+    """Routes whose p95 or throughput moved past the tolerance; noise_ms absorbs jitter on fast routes"""
+    regressions = []
+    for scenario, routes in results.items():
+        for route, stats in routes.items():
+            base = baseline.get(scenario, {}).get(route)
+            if base is None:
+                continue
+            if stats["p95"] > base["p95"] * (1 + tolerance) and stats["p95"] - base["p95"] > noise_ms:
+                regressions.append(f"{scenario} {route}: p95 {base['p95']}ms -> {stats['p95']}ms")
+            if stats["rps"] < base["rps"] * (1 - tolerance):
+                regressions.append(f"{scenario} {route}: {base['rps']} -> {stats['rps']} req/s")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="fndc_load")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the journeys of every scenario")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--tournaments", type=int, default=50)
+    parser.add_argument("--proposals", type=int, default=10, help="cube proposals per tournament")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--noise-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print("🏋️ FNDC API load test")
+    print("=" * 50)
+    settings.MONGO_DB_NAME = args.database
+    await connect_to_mongo()
+    await (await get_db()).client.drop_database(args.database)
+    await close_mongo_connection()
+
+    # Imported after MONGO_DB_NAME is set; startup connects, creates indexes and warms up
+    from app.main import app
+    await app.router.startup()
+    try:
+        await app.state.warmup_task
+        fx = await seed(args.players, args.tournaments, args.proposals, random.Random(args.seed))
+
+        results = {}
+        async with AsyncClient(
+            # Server errors are recorded as unexpected statuses instead of aborting the run
+            transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://load.test"
+        ) as client:
+            for name in args.scenarios:
+                journeys = max(1, round(SCENARIOS[name][1] * args.scale))
+                results[name] = await run_scenario(client, name, fx, journeys, args.concurrency, args.seed)
+    finally:
+        await (await get_db()).client.drop_database(args.database)
+        await app.router.shutdown()
+
+    unexpected = sum(stats["unexpected"] for routes in results.values() for stats in routes.values())
+    print("\n" + "=" * 50)
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"💾 Baselines for {', '.join(results)} written to {args.baseline}")
+        regressions = []
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.noise_ms)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+    else:
+        print(f"⚠️ No baselines at {args.baseline}; run with --update-baseline to record them")
+        regressions = []
+
+    if unexpected:
+        print(f"❌ {unexpected} responses with an unexpected status")
+    if regressions or unexpected:
+        sys.exit(1)
+    print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,280 @@
+"""
+Generador de datos sintéticos para pruebas de escala.
+
+Crea usuarios (con contraseña y de Google), torneos repartidos en varios
+años, inscripciones y propuestas de cubos con una distribución sesgada
+(pocos torneos muy concurridos, pocos jugadores que van a todo). Con la
+misma semilla genera exactamente los mismos documentos, incluidos los _id
+(solo cambia la sal del hash de contraseña), así que los benchmarks son
+comparables entre corridas:
+
+    python seed_data.py --database fndc_scale --users 10000 --tournaments 500 --drop
+
+Todos los usuarios con contraseña (y el admin admin@seed.fndc.test) usan
+la contraseña de --password.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, UTC
+from itertools import accumulate, islice
+from typing import Iterable, Iterator, List
+from bson import ObjectId
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection, get_db
+from app.auth import get_password_hash
+from app.indexes import ensure_indexes
+from app.models import CubeStatus, UserRole
+
+CUBES = ["Vintage Cube", "Legacy Cube", "Pauper Cube", "Peasant Cube", "Modern Cube", "Commander Cube", "Set Cube"]
+CITIES = ["Buenos Aires", "Córdoba", "Rosario", "Mendoza", "La Plata", "Mar del Plata", "Tucumán"]
+
+
+def object_id(at: datetime, sequence: int) -> ObjectId:
+    """Deterministic ObjectId that still sorts by creation time, like a real one"""
+    return ObjectId(int(at.timestamp()).to_bytes(4, "big") + sequence.to_bytes(8, "big"))
+
+
+def zipf_weights(count: int, skew: float, rng: random.Random) -> List[float]:
+    """Zipf weights (1 / rank^skew) assigned to shuffled positions"""
+    weights = [1 / rank ** skew for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return weights
+
+
+def weighted_sample(population: list, cum_weights: List[float], k: int, rng: random.Random) -> list:
+    """k distinct items drawn by weight"""
+    if k * 2 > len(population):
+        # Close to everyone: weights barely matter and rejection would crawl
+        return rng.sample(population, k)
+    chosen = {}
+    while len(chosen) < k:
+        for item in rng.choices(population, cum_weights=cum_weights, k=k - len(chosen)):
+            chosen[id(item)] = item
+    return list(islice(chosen.values(), k))
+
+
+def batches(documents: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(documents)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def insert(collection, documents: Iterable[dict], batch_size: int) -> int:
+    start = time.perf_counter()
+    inserted = 0
+    for batch in batches(documents, batch_size):
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {collection.name}: {inserted} documentos en {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):.0f}/s)")
+    return inserted
+
+
+def generate_users(args, anchor: datetime, rng: random.Random, hashed_password: str) -> List[dict]:
+    first = anchor - timedelta(days=365 * args.years)
+    users = [{
+        "_id": object_id(first, 0),
+        "email": "admin@seed.fndc.test",
+        "name": "Seed Admin",
+        "hashed_password": hashed_password,
+        "role": UserRole.ADMIN,
+        "is_verified": True,
+        "created_at": first,
+        "updated_at": first
+    }]
+    for i in range(1, args.users + 1):
+        created_at = first + timedelta(seconds=rng.uniform(0, (anchor - first).total_seconds()))
+        user = {
+            "_id": object_id(created_at, i),
+            "email": f"user{i}@seed.fndc.test",
+            "name": f"Jugador {i}",
+            "role": UserRole.USER,
+            "preferred_cube": rng.choice(CUBES) if rng.random() < 0.4 else None,
+            "created_at": created_at,
+            "updated_at": created_at
+        }
+        if rng.random() < args.google_fraction:
+            user["google_id"] = f"seed-google-{i}"
+            user["picture"] = f"https://lh3.googleusercontent.com/a/seed-{i}"
+            user["is_verified"] = True
+        else:
+            user["hashed_password"] = hashed_password
+            user["is_verified"] = rng.random() < 0.9
+        users.append(user)
+    return users
+
+
+def generate_tournaments(args, anchor: datetime, rng: random.Random, admin_id: str) -> List[dict]:
+    # From --years ago up to six months ahead, so some are still open for sign-up
+    first = anchor - timedelta(days=365 * args.years)
+    span = (anchor + timedelta(days=180) - first).total_seconds()
+    tournaments = []
+    for i in range(args.tournaments):
+        date = (first + timedelta(seconds=rng.uniform(0, span))).replace(hour=0, minute=0, second=0, microsecond=0)
+        created_at = date - timedelta(days=rng.randint(20, 90))
+        tournaments.append({
+            "_id": object_id(created_at, i),
+            "name": f"FNDC {date.year} #{i + 1}",
+            "date": date,
+            "location": rng.choice(CITIES),
+            "start_time": rng.choice(["10:00", "11:00", "14:00", "18:00"]),
+            "duration_days": rng.choice([1, 1, 1, 2, 3]),
+            "rounds": rng.choice([3, 4, 5, 6]),
+            "created_by": admin_id,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "registration_count": 0,
+            "proposal_count": 0,
+            "enabled_cube_count": 0
+        })
+    return tournaments
+
+
+def plan_counts(total: int, weights: List[float], cap: int) -> List[int]:
+    """Split total proportionally to weights, at most cap each"""
+    weight_sum = sum(weights)
+    return [min(cap, round(total * weight / weight_sum)) for weight in weights]
+
+
+def generate_registrations(args, anchor: datetime, rng: random.Random, tournaments: List[dict], users: List[dict], registrants: dict) -> Iterator[dict]:
+    players = users[1:]
+    # A few regulars attend many tournaments
+    cum_weights = list(accumulate(zipf_weights(len(players), args.skew, rng)))
+    counts = plan_counts(
+        args.registrations, zipf_weights(len(tournaments), args.skew, rng),
+        min(args.max_players, len(players))
+    )
+    sequence = 0
+    for tournament, count in zip(tournaments, counts):
+        chosen = weighted_sample(players, cum_weights, count, rng)
+        registrants[tournament["_id"]] = chosen
+        tournament["registration_count"] = count
+        tournament_id = str(tournament["_id"])
+        closes = min(tournament["date"], anchor)
+        window = max((closes - tournament["created_at"]).total_seconds(), 1)
+        for user in chosen:
+            registered_at = tournament["created_at"] + timedelta(seconds=rng.uniform(0, window))
+            sequence += 1
+            yield {
+                "_id": object_id(registered_at, sequence),
+                "tournament_id": tournament_id,
+                "user_id": str(user["_id"]),
+                "registered_at": registered_at
+            }
+
+
+def generate_proposals(args, anchor: datetime, rng: random.Random, tournaments: List[dict], registrants: dict) -> Iterator[dict]:
+    # Busier tournaments get more proposals
+    weights = [tournament["registration_count"] + 1 for tournament in tournaments]
+    counts = plan_counts(args.proposals, weights, args.max_proposals)
+    sequence = 0
+    for tournament, count in zip(tournaments, counts):
+        proposers = registrants[tournament["_id"]]
+        if not proposers:
+            continue
+        enabled_rate = 0.5 if tournament["date"] < anchor else 0.2
+        for _ in range(count):
+            status = CubeStatus.HABILITADO if rng.random() < enabled_rate else CubeStatus.PROPUESTO
+            created_at = tournament["created_at"] + timedelta(days=rng.uniform(0, 15))
+            sequence += 1
+            cube = rng.choice(CUBES)
+            tournament["proposal_count"] += 1
+            if status == CubeStatus.HABILITADO:
+                tournament["enabled_cube_count"] += 1
+            yield {
+                "_id": object_id(created_at, sequence),
+                "tournament_id": str(tournament["_id"]),
+                "user_id": str(rng.choice(proposers)["_id"]),
+                "cube_url": f"https://cubecobra.com/cube/overview/seed{sequence}",
+                "description": f"{cube} de la comunidad, versión {rng.randint(1, 20)}",
+                "status": status,
+                "created_at": created_at,
+                "updated_at": created_at
+            }
+
+
+async def seed(args):
+    rng = random.Random(args.seed)
+    anchor = datetime.fromisoformat(args.anchor).replace(tzinfo=UTC)
+    settings.MONGO_DB_NAME = args.database
+    await connect_to_mongo()
+    db = await get_db()
+    try:
+        if args.drop:
+            await db.client.drop_database(args.database)
+            print(f"🗑️ Base de datos {args.database} eliminada")
+        elif await db.users.estimated_document_count() or await db.tournaments.estimated_document_count():
+            print(f"❌ {args.database} ya tiene datos; usa --drop para regenerarla")
+            return False
+
+        # One bcrypt hash shared by every password account
+        hashed_password = get_password_hash(args.password)
+        users = generate_users(args, anchor, rng, hashed_password)
+        tournaments = generate_tournaments(args, anchor, rng, str(users[0]["_id"]))
+
+        # Registrations and proposals are generated first, they fill in the tournament counters
+        registrants = {}
+        registrations = list(generate_registrations(args, anchor, rng, tournaments, users, registrants))
+        proposals = list(generate_proposals(args, anchor, rng, tournaments, registrants))
+
+        await insert(db.users, users, args.batch_size)
+        await insert(db.tournaments, tournaments, args.batch_size)
+        await insert(db.tournament_registrations, registrations, args.batch_size)
+        await insert(db.cube_proposals, proposals, args.batch_size)
+
+        # Building indexes once is faster than maintaining them on every batch
+        start = time.perf_counter()
+        await ensure_indexes(db)
+        print(f"✅ Índices creados en {time.perf_counter() - start:.1f}s")
+
+        google = sum(1 for user in users if "google_id" in user)
+        busiest = max(tournaments, key=lambda tournament: tournament["registration_count"], default=None)
+        print(f"\n📊 {len(users)} usuarios ({google} de Google), {len(tournaments)} torneos, "
+              f"{len(registrations)} inscripciones, {len(proposals)} propuestas de cubos")
+        if busiest:
+            print(f"   Torneo más concurrido: {busiest['name']} con {busiest['registration_count']} inscriptos")
+        print(f"   Admin: admin@seed.fndc.test / {args.password}")
+        return True
+    finally:
+        await close_mongo_connection()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="fndc_scale")
+    parser.add_argument("--drop", action="store_true", help="borrar la base antes de generar")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", default="2025-01-01", help="fecha de referencia (los torneos se reparten alrededor)")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--google-fraction", type=float, default=0.3)
+    parser.add_argument("--tournaments", type=int, default=500)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--registrations", type=int, default=100000, help="total aproximado")
+    parser.add_argument("--max-players", type=int, default=1000, help="inscriptos máximos por torneo")
+    parser.add_argument("--proposals", type=int, default=5000, help="total aproximado")
+    parser.add_argument("--max-proposals", type=int, default=60, help="propuestas máximas por torneo")
+    parser.add_argument("--skew", type=float, default=1.0, help="exponente Zipf de la popularidad")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--password", default="seed-password")
+    args = parser.parse_args()
+
+    print("🌱 Generar Datos Sintéticos")
+    print("=" * 40)
+    start = time.perf_counter()
+    if await seed(args):
+        print(f"\n🎉 Datos generados en {time.perf_counter() - start:.1f}s")
+    else:
+        print("\n💥 No se generaron datos.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
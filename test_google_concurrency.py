@@ -0,0 +1,133 @@
+"""
+Concurrency test for the Google sign-in upsert (crud.upsert_google_user).
+
+Fires many simultaneous first logins for the same Google account against a
+throwaway database (default fndc_test) on MONGO_URI and checks that exactly
+one user document comes out of every scenario:
+
+    python test_google_concurrency.py --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, UTC
+
+# Agregar el directorio del proyecto al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import connect_to_mongo, close_mongo_connection, get_db
+from app.indexes import ensure_indexes
+from app.models import UserRole
+from app import crud
+
+failures = []
+
+
+def check(condition: bool, message: str):
+    print(f"{'✅' if condition else '❌'} {message}")
+    if not condition:
+        failures.append(message)
+
+
+def google_info(google_id: str, email: str) -> dict:
+    return {"google_id": google_id, "email": email, "name": "Google Player", "picture": None}
+
+
+async def login_storm(info: dict, concurrency: int) -> list:
+    """Run concurrency simultaneous sign-ins, returning users or exceptions"""
+    return await asyncio.gather(
+        *(crud.upsert_google_user(info) for _ in range(concurrency)),
+        return_exceptions=True
+    )
+
+
+async def scenario_first_login(db, concurrency: int):
+    print("\n🔍 Concurrent first logins of a new account")
+    results = await login_storm(google_info("g-new", "new@example.com"), concurrency)
+    errors = [r for r in results if isinstance(r, Exception)]
+    check(not errors, f"all {concurrency} sign-ins succeeded ({len(errors)} errors: {errors[:1]})")
+    check(len({r["id"] for r in results if isinstance(r, dict)}) == 1, "every sign-in returned the same user")
+    check(await db.users.count_documents({"email": "new@example.com"}) == 1, "exactly one user document")
+    user = await db.users.find_one({"email": "new@example.com"})
+    check(user["google_id"] == "g-new" and user["is_verified"] and user["role"] == UserRole.USER, "user created verified with the Google ID")
+
+
+async def scenario_link_existing(db, concurrency: int):
+    print("\n🔍 Concurrent first logins linking an email/password account")
+    now = datetime.now(UTC)
+    result = await db.users.insert_one({
+        "email": "linked@example.com",
+        "name": "Password Player",
+        "hashed_password": "not-a-real-hash",
+        "role": UserRole.ADMIN,
+        "is_verified": False,
+        "created_at": now,
+        "updated_at": now
+    })
+    results = await login_storm(google_info("g-link", "linked@example.com"), concurrency)
+    errors = [r for r in results if isinstance(r, Exception)]
+    check(not errors, f"all {concurrency} sign-ins succeeded ({len(errors)} errors)")
+    check({r["id"] for r in results if isinstance(r, dict)} == {str(result.inserted_id)}, "every sign-in returned the existing user")
+    check(await db.users.count_documents({"email": "linked@example.com"}) == 1, "no duplicate user document")
+    user = await db.users.find_one({"_id": result.inserted_id})
+    check(user["google_id"] == "g-link" and user["is_verified"], "existing account linked and verified")
+    check(
+        user["name"] == "Password Player" and user["role"] == UserRole.ADMIN and user["hashed_password"] == "not-a-real-hash",
+        "existing name, role and password kept"
+    )
+
+
+async def scenario_email_of_other_google_account(db):
+    print("\n🔍 Sign-in with an email already linked to another Google account")
+    await crud.upsert_google_user(google_info("g-owner", "owned@example.com"))
+    try:
+        await crud.upsert_google_user(google_info("g-intruder", "owned@example.com"))
+        check(False, "sign-in rejected")
+    except ValueError:
+        check(True, "sign-in rejected")
+    user = await db.users.find_one({"email": "owned@example.com"})
+    check(user["google_id"] == "g-owner", "account stays linked to its Google ID")
+    check(await db.users.count_documents({"google_id": "g-intruder"}) == 0, "no user created for the other Google ID")
+
+
+async def scenario_returning_login_with_new_email(db):
+    print("\n🔍 Returning login after the Google account changed its email")
+    first = await crud.upsert_google_user(google_info("g-moved", "old@example.com"))
+    again = await crud.upsert_google_user(google_info("g-moved", "renamed@example.com"))
+    check(first["id"] == again["id"], "matched by Google ID")
+    check(await db.users.count_documents({"google_id": "g-moved"}) == 1, "exactly one user document")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="fndc_test")
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    print("🧪 Google sign-in upsert concurrency test")
+    print("=" * 50)
+    settings.MONGO_DB_NAME = args.database
+    await connect_to_mongo()
+    db = await get_db()
+    try:
+        await db.client.drop_database(args.database)
+        await ensure_indexes(db)
+        await scenario_first_login(db, args.concurrency)
+        await scenario_link_existing(db, args.concurrency)
+        await scenario_email_of_other_google_account(db)
+        await scenario_returning_login_with_new_email(db)
+    finally:
+        await db.client.drop_database(args.database)
+        await close_mongo_connection()
+
+    print("\n" + "=" * 50)
+    if failures:
+        print(f"❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("✅ All checks passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())